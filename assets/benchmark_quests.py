@@ -0,0 +1,293 @@
+# How to run: python assets/benchmark_quests.py
+# Times the quest generation pipeline and saves the results to quest_benchmark.json
+# Compare two runs with: python assets/benchmark_quests.py --compare old_results.json
+
+import json
+import os
+import sys
+import time
+import random
+import platform
+import argparse
+import itertools
+import tempfile
+import tracemalloc
+import contextlib
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+
+import generate_quests
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module, peak RSS is reported as None
+    resource = None
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def time_calls(func, repeat):
+    """Call func repeat times and return the seconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def write_synthetic_library(num_tasks, directory, seed=0):
+    """
+    Write a TaskLibrary.json padded with synthetic tasks up to num_tasks entries
+    
+    The real tasks are kept so every path still has its pool. The task pools
+    come from PATH_TASKS, so synthetic tasks are never drawn into challenges;
+    they only grow what has to be loaded, checked and written to taskLibrary.
+    """
+    with open('assets/TaskLibrary.json', 'r', encoding='utf8') as f:
+        library = json.load(f)
+    
+    rng = random.Random(seed)
+    categories = ["mindfulness", "learning", "physical", "social", "creativity"]
+    real_tasks = len(library) - ("task_category" in library)
+    for index in range(max(0, num_tasks - real_tasks)):
+        library[f"synthetic-{index}"] = {
+            "task": f"Synthetic task {index}",
+            "category": rng.choice(categories),
+            "intensities": {
+                str(intensity): {"duration": f"{intensity * rng.randint(5, 15)} minutes"}
+                for intensity in generate_quests.INTENSITIES
+            }
+        }
+    
+    path = os.path.join(directory, f"TaskLibrary-{num_tasks}.json")
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(library, f, indent=2)
+    return path
+
+def run_generate_case(case):
+    """
+    Run one full generate_quest_json + read_quests case
+    
+    Runs in a fresh process (see run_isolated) so the peak RSS belongs to this case only.
+    """
+    with tempfile.TemporaryDirectory() as output_dir:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            generate_quests.generate_quest_json(
+                num_variations=case["variations"], engine=case["engine"], seed=case["seed"],
+                output_format=case["format"], library_path=case["library_path"], output_dir=output_dir)
+            generate_seconds = time.perf_counter() - start
+            generate_rss = peak_rss_mb()
+            
+            output_path = os.path.join(output_dir, generate_quests.OUTPUT_FORMATS[case["format"]])
+            output_bytes = os.path.getsize(output_path)
+            
+            read_seconds = None
+            if case["format"] in ("pretty", "binary"):
+                start = time.perf_counter()
+                generate_quests.read_quests(output_path)
+                read_seconds = time.perf_counter() - start
+    
+    challenges = case["variations"] * len(generate_quests.PATHS) * len(generate_quests.INTENSITIES)
+    return dict(case,
+                challenges=challenges,
+                generate_seconds=round(generate_seconds, 4),
+                challenges_per_second=round(challenges / generate_seconds, 1),
+                read_seconds=None if read_seconds is None else round(read_seconds, 4),
+                peak_rss_mb=generate_rss,
+                output_bytes=output_bytes)
+
+def run_isolated(func, case):
+    """Run func(case) in a freshly spawned process and return its result"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(func, case).result()
+
+def benchmark_stages(library_path, num_tasks, engines, repeat):
+    """Time load_task_library, generate_weekly_plan and generate_challenge in this process"""
+    results = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for use_cache in (False, True):
+            generate_quests.load_task_library(use_cache, library_path)  # Warm up the cache file
+            seconds = time_calls(lambda: generate_quests.load_task_library(use_cache, library_path), repeat)
+            results.append({"stage": "load_task_library", "tasks": num_tasks, "cache": use_cache,
+                             "seconds_per_call": round(seconds, 6)})
+        
+        task_library = generate_quests.load_task_library(True, library_path)
+        rng = random.Random(0)
+        for engine in engines:
+            seconds = time_calls(lambda: generate_quests.generate_weekly_plan(
+                "balanced", 3, 1, task_library, engine, rng), repeat * 10)
+            results.append({"stage": "generate_weekly_plan", "tasks": num_tasks, "engine": engine,
+                            "seconds_per_call": round(seconds, 7), "calls_per_second": round(1 / seconds, 1)})
+            
+            seconds = time_calls(lambda: generate_quests.generate_challenge(
+                "balanced", 3, task_library, engine, rng), repeat * 2)
+            results.append({"stage": "generate_challenge", "tasks": num_tasks, "engine": engine,
+                            "seconds_per_call": round(seconds, 7), "challenges_per_second": round(1 / seconds, 1)})
+    return results
+
+def benchmark_challenge_memory(library_path, num_tasks, num_challenges, seed):
+    """
+    Measure the memory held per challenge as dicts and as CompactChallenge objects
+    
+    The same challenges are generated twice and kept in a list, once in each
+    form; tracemalloc counts what the list holds after generation, including
+    the shared TaskTable for the compact form.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        task_library = generate_quests.load_task_library(True, library_path)
+    task_library_output = generate_quests.build_task_library_output(task_library)
+    jobs = list(itertools.islice(itertools.cycle(generate_quests.iter_variation_jobs(
+        max(1, num_challenges // 15), "scheduler", seed)), num_challenges))
+    
+    results = []
+    for model in ("dict", "compact"):
+        tracemalloc.start()
+        table = generate_quests.TaskTable(task_library_output) if model == "compact" else None
+        held = []
+        for path, intensity, variation, num_variations, engine, job_seed in jobs:
+            challenge = generate_quests.generate_variation(path, intensity, variation, num_variations,
+                                                           engine, job_seed, task_library)
+            held.append(challenge if table is None else generate_quests.compact_challenge(challenge, table))
+        held_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results.append({"memory": "challenges", "model": model, "tasks": num_tasks, "challenges": num_challenges,
+                        "bytes_per_challenge": round(held_bytes / num_challenges)})
+        del held, table
+    return results
+
+def case_key(result):
+    """Identify a result by everything except its measurements"""
+    measured = {"seconds_per_call", "calls_per_second", "challenges_per_second", "generate_seconds",
+                "read_seconds", "peak_rss_mb", "output_bytes", "challenges", "library_path",
+                "bytes_per_challenge"}
+    return json.dumps({k: v for k, v in result.items() if k not in measured}, sort_keys=True)
+
+def print_results(results):
+    """Print the results as tables: pipeline stages, full runs and memory per challenge"""
+    print("\n" + "-" * 80)
+    print(f"{'Stage':<22}{'Tasks':>7}{'Engine/cache':>14}{'us/call':>12}{'per second':>14}")
+    print("-" * 80)
+    for result in results:
+        if "stage" not in result:
+            continue
+        variant = result.get("engine", "cached" if result.get("cache") else "no cache")
+        per_second = result.get("calls_per_second") or result.get("challenges_per_second") or ""
+        print(f"{result['stage']:<22}{result['tasks']:>7}{variant:>14}"
+              f"{result['seconds_per_call'] * 1e6:>12.1f}{per_second:>14}")
+    
+    print("\n" + "-" * 80)
+    print(f"{'Variations':>10}{'Tasks':>7}{'Engine':>11}{'Format':>9}{'Challenges/s':>14}"
+          f"{'Read (s)':>10}{'Peak MB':>9}{'Bytes':>12}")
+    print("-" * 80)
+    for result in results:
+        if "stage" in result or "memory" in result:
+            continue
+        read_seconds = "" if result["read_seconds"] is None else f"{result['read_seconds']:.3f}"
+        print(f"{result['variations']:>10}{result['tasks']:>7}{result['engine']:>11}{result['format']:>9}"
+              f"{result['challenges_per_second']:>14}{read_seconds:>10}{str(result['peak_rss_mb']):>9}"
+              f"{result['output_bytes']:>12,}")
+    print("-" * 80)
+    
+    memory = [result for result in results if "memory" in result]
+    if memory:
+        print(f"\n{'Challenge model':<18}{'Tasks':>7}{'Challenges':>12}{'Bytes/challenge':>17}")
+        print("-" * 80)
+        for result in memory:
+            print(f"{result['model']:<18}{result['tasks']:>7}{result['challenges']:>12}"
+                  f"{result['bytes_per_challenge']:>17,}")
+        print("-" * 80)
+
+def print_comparison(results, baseline_path):
+    """Print how each result moved against a previously saved run"""
+    with open(baseline_path, 'r', encoding='utf8') as f:
+        baseline = {case_key(result): result for result in json.load(f)["results"]}
+    
+    print(f"\nChange against {baseline_path} (ratio new/old, below 1.00 is faster or smaller):")
+    print("-" * 80)
+    for result in results:
+        old = baseline.get(case_key(result))
+        if old is None:
+            continue
+        label = ", ".join(f"{k}={v}" for k, v in json.loads(case_key(result)).items())
+        ratios = []
+        for metric in ("seconds_per_call", "generate_seconds", "read_seconds", "peak_rss_mb", "output_bytes",
+                       "bytes_per_challenge"):
+            if result.get(metric) and old.get(metric):
+                ratios.append(f"{metric} {result[metric] / old[metric]:.2f}")
+        print(f"{label}: {', '.join(ratios)}")
+    print("-" * 80)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the quest generation pipeline')
+    parser.add_argument('--variations', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='Variation counts for the full generation runs')
+    parser.add_argument('--library-sizes', type=int, nargs='+', default=[26, 250, 1000, 5000],
+                        help='TaskLibrary sizes; the real library is padded with synthetic tasks, '
+                             'which grow loading and taskLibrary output but not the task pools')
+    parser.add_argument('--engines', nargs='+', choices=generate_quests.ENGINES, default=[engine for engine in generate_quests.ENGINES
+                                 if engine != "numpy" or generate_quests.np is not None],
+                        help='Engines to compare (numpy only by default when it is installed)')
+    parser.add_argument('--formats', nargs='+', choices=list(generate_quests.OUTPUT_FORMATS),
+                        default=list(generate_quests.OUTPUT_FORMATS), help='Output formats to compare')
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='Calls per stage timing (default: 50)')
+    parser.add_argument('--memory-challenges', type=int, default=3000,
+                        help='Challenges held for the memory per challenge measurement (default: 3000)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for every generation run')
+    parser.add_argument('--output', '-o', default='quest_benchmark.json',
+                        help='Where to save the results (default: quest_benchmark.json)')
+    parser.add_argument('--compare', metavar='OLD_RESULTS',
+                        help='Earlier results file to compare against')
+    args = parser.parse_args()
+    
+    results = []
+    with tempfile.TemporaryDirectory() as library_dir:
+        library_paths = {size: write_synthetic_library(size, library_dir) for size in args.library_sizes}
+        smallest = min(args.library_sizes)
+        
+        for size, library_path in library_paths.items():
+            print(f"Timing pipeline stages with {size} tasks...")
+            results.extend(benchmark_stages(library_path, size, args.engines, args.repeat))
+        
+        print(f"Measuring memory per challenge over {args.memory_challenges} challenges...")
+        results.extend(benchmark_challenge_memory(library_paths[smallest], smallest,
+                                                  args.memory_challenges, args.seed))
+        
+        # Variation sweep on the smallest library, library sweep at the smallest variation count.
+        # The library sweep only grows loading and the taskLibrary output: pools stay the PATH_TASKS ones
+        cases = [(variations, smallest) for variations in args.variations]
+        cases += [(min(args.variations), size) for size in args.library_sizes if size != smallest]
+        for variations, size in cases:
+            for engine in args.engines:
+                for output_format in args.formats:
+                    print(f"Generating {variations} variations with a {size}-task library "
+                          f"({engine}, {output_format})...")
+                    results.append(run_isolated(run_generate_case, {
+                        "variations": variations, "tasks": size, "engine": engine, "format": output_format,
+                        "seed": args.seed, "library_path": library_paths[size]}))
+    
+    for result in results:
+        result.pop("library_path", None)
+    
+    print_results(results)
+    if args.compare:
+        print_comparison(results, args.compare)
+    
+    with open(args.output, 'w', encoding='utf8') as f:
+        json.dump({
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+            },
+            "results": results
+        }, f, indent=2)
+    print(f"Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,32 @@ import json
 import os
 import copy
 import random
+import hashlib
 import argparse
+import itertools
+import io
+import re
+import codecs
+import sys
+import time
+import mmap
+import array
+import struct
+import marshal
+import cProfile
+import pstats
+import contextlib
+import functools
+import threading
+import urllib.parse
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import numpy as np
+except ImportError:  # Only the numpy engine needs it
+    np = None
 
 def apply_intensity_multiplier(activity, intensity, intensity_multipliers):
     """
@@ -26,265 +51,3053 @@ def apply_intensity_multiplier(activity, intensity, intensity_multipliers):
     else:
         return f"intensity modification is required, standard is {activity['duration_minutes']}"
 
-def load_task_library():
-    """Load the task library from JSON file"""
+class _StageTimer:
+    """Context manager adding the time spent inside it to a stage of GenerationStats"""
+    
+    def __init__(self, stats, stage):
+        self.stats = stats
+        self.stage = stage
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+    
+    def __exit__(self, *exc_info):
+        self.stats.add_time(self.stage, time.perf_counter() - self.start)
+
+class GenerationStats:
+    """
+    Stage timings and per path-intensity counters of a generation run
+    
+    Stages: load, plan (picking the daily pairs), challenge (a whole variation,
+    plan included), task_library and serialize. Counters are kept per base ID
+    such as "1-2" so hot spots in the sampler can be traced to a task pool.
+    """
+    
+    def __init__(self):
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.counters = {}
+    
+    def timer(self, stage):
+        return _StageTimer(self, stage)
+    
+    def add_time(self, stage, seconds, calls=1):
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        self.stage_calls[stage] = self.stage_calls.get(stage, 0) + calls
+    
+    def count(self, name, path, intensity, amount=1):
+        group = self.counters.setdefault(f"{PATH_CODES[path]}-{intensity}", {})
+        group[name] = group.get(name, 0) + amount
+    
+    def to_dict(self):
+        return {
+            "stage_seconds": self.stage_seconds,
+            "stage_calls": self.stage_calls,
+            "counters": self.counters
+        }
+    
+    def merge(self, other):
+        """Add the stats of another process, as returned by to_dict"""
+        for stage, seconds in other["stage_seconds"].items():
+            self.add_time(stage, seconds, other["stage_calls"][stage])
+        for group, counts in other["counters"].items():
+            for name, amount in counts.items():
+                self.counters.setdefault(group, {})
+                self.counters[group][name] = self.counters[group].get(name, 0) + amount
+    
+    def print_summary(self, total_seconds):
+        """Print the stage timings and the counters as tables"""
+        stages = dict(self.stage_seconds)
+        calls = dict(self.stage_calls)
+        if "challenge" in stages:
+            # Challenge time includes picking the pairs; show the rest as assembly
+            stages["assembly"] = stages["challenge"] - stages.get("plan", 0.0)
+            calls["assembly"] = calls["challenge"]
+            del stages["challenge"]
+        
+        print("\n" + "-" * 80)
+        print(f"{'Stage':<16}{'Calls':>10}{'Total (s)':>12}{'Mean (us)':>12}{'Share':>9}")
+        print("-" * 80)
+        for stage in ("load", "plan", "assembly", "task_library", "serialize"):
+            if stage in stages:
+                share = stages[stage] / total_seconds if total_seconds else 0
+                print(f"{stage:<16}{calls[stage]:>10}{stages[stage]:>12.4f}"
+                      f"{stages[stage] / calls[stage] * 1e6:>12.1f}{share:>9.1%}")
+        print(f"{'total':<16}{'':>10}{total_seconds:>12.4f}")
+        
+        names = sorted({name for counts in self.counters.values() for name in counts})
+        if names:
+            print("\n" + "-" * 80)
+            print(f"{'Path':<8}" + "".join(f"{name.replace('_', ' '):>18}" for name in names))
+            print("-" * 80)
+            for group in sorted(self.counters):
+                print(f"{group:<8}" + "".join(f"{self.counters[group].get(name, 0):>18}" for name in names))
+        print("-" * 80)
+
+# Stats of the current run, None unless --stats or --profile turned them on
+_stats = None
+_NO_TIMER = contextlib.nullcontext()
+
+def report_run_stats(stats, total_seconds, stats_path=None, profiler=None, profile_path=None):
+    """
+    Print the stats summary of a run and save the machine-readable results
+    
+    Args:
+        stats (GenerationStats): Stats collected during the run
+        total_seconds (float): Wall time of the run
+        stats_path (str): Where to write the stats as JSON, if given
+        profiler (cProfile.Profile): Profiler that ran alongside, if any
+        profile_path (str): Where to dump the profiler data
+    """
+    stats.print_summary(total_seconds)
+    
+    if profiler is not None:
+        profiler.dump_stats(profile_path)
+        print(f"\nTop functions by cumulative time (full profile in {profile_path}):")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+    
+    if stats_path:
+        with open(stats_path, 'w', encoding='utf8') as f:
+            json.dump(dict(stats.to_dict(), total_seconds=total_seconds), f, indent=2)
+        print(f"Stats saved to: {stats_path}")
+
+def enable_stats():
+    """Start collecting GenerationStats for this process and return them"""
+    global _stats
+    _stats = GenerationStats()
+    return _stats
+
+def stage_timer(stage):
+    """Time a block as part of a stage when stats are on; a no-op otherwise"""
+    return _stats.timer(stage) if _stats is not None else _NO_TIMER
+
+class AtomicWriter:
+    """
+    Write a file through a temp file in the same directory
+    
+    On a clean exit the temp file is compared with the existing file by size
+    and SHA-256. It replaces the file with an atomic rename only if the content
+    differs. Otherwise it is discarded, so an unchanged output keeps its
+    modification time and file watchers do not fire. Readers never see a
+    half-written file, and if writing fails the old file is left as it was.
+    The temp file is synced to disk before the rename and the directory after
+    it, so a crash cannot leave a replaced file that is the right size but
+    holds no data.
+    
+    Args:
+        path (str): The file to write
+        
+    Attributes:
+        written (bool): Whether the file was replaced, set when the block exits
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.written = False
+        directory, name = os.path.split(os.path.abspath(path))
+        self.temp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    
+    def __enter__(self):
+        # Created like a regular file, so the permissions follow the umask
+        self.file = os.fdopen(os.open(self.temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o666), 'w+b')
+        return self.file
+    
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            if exc_type is None:
+                self.file.flush()
+                if not _same_content(self.temp_path, self.path):
+                    os.fsync(self.file.fileno())
+                    self.file.close()
+                    if os.path.exists(self.path):
+                        os.chmod(self.temp_path, os.stat(self.path).st_mode & 0o7777)
+                    os.replace(self.temp_path, self.path)
+                    self.written = True
+                    _fsync_directory(os.path.dirname(self.temp_path))
+        finally:
+            self.file.close()
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+def _fsync_directory(directory):
+    """Sync a directory so a rename inside it survives a crash; skipped where directories cannot be opened"""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
     try:
-        with open('assets/TaskLibrary.json', 'r', encoding='utf8') as f:
-            return json.load(f)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+def _same_content(new_path, old_path):
+    """Return whether two files hold the same bytes, comparing sizes before hashes"""
+    if not os.path.exists(old_path) or os.path.getsize(new_path) != os.path.getsize(old_path):
+        return False
+    return _file_digest(new_path) == _file_digest(old_path)
+
+def write_if_changed(path, data):
+    """
+    Atomically write bytes to a file unless it already holds them
+    
+    Returns:
+        bool: Whether the file was written
+    """
+    writer = AtomicWriter(path)
+    with writer as f:
+        f.write(data)
+    return writer.written
+
+def report_write(path, written):
+    """Print whether an output file was written or skipped as unchanged"""
+    if written:
+        print(f"File saved to: {path}")
+    else:
+        print(f"File unchanged, not rewritten: {path}")
+
+def load_task_library(use_cache=True, library_path='assets/TaskLibrary.json'):
+    """
+    Load the task library from JSON file
+    
+    Args:
+        use_cache (bool): Reuse the parsed library cached in assets/__pycache__
+            while TaskLibrary.json is unchanged
+        library_path (str): Task library to load instead of assets/TaskLibrary.json
+            
+    Returns:
+        TaskLibrary: The checked task library with its task pools
+    """
+    cache_path = None
+    if use_cache:
+        # Other libraries (e.g. benchmark ones) are cached in a __pycache__ next to them
+        library_dir, library_name = os.path.split(os.path.abspath(library_path))
+        cache_path = os.path.join(library_dir, '__pycache__', os.path.splitext(library_name)[0] + '.marshal')
+    try:
+        task_library = TaskLibrary.load(library_path, cache_path)
     except FileNotFoundError:
-        print("Error: TaskLibrary.json not found in assets directory")
+        print(f"Error: {library_path} not found")
         exit(1)
     except json.JSONDecodeError:
-        print("Error: TaskLibrary.json is not valid JSON")
+        print(f"Error: {library_path} is not valid JSON")
+        exit(1)
+    
+    if task_library.errors:
+        print(f"Error: {library_path} does not match the expected structure:")
+        for error in task_library.errors:
+            print(f"  - {error}")
         exit(1)
+    
+    return task_library
+
+# Define appropriate tasks for each path
+PATH_TASKS = {
+    "mental": ["meditation", "journaling", "book-reading", "podcast", "chill-music", 
+              "self-reflection", "creative-training", "article-reading", "skill-dev",
+              "documentary", "cooking", "social-talk", "hobby-discovery"],
+    "physical": ["walking", "bodyweight", "stretching", "yoga", "jogging", 
+                "rhythmic-movement", "recovery", "good-sleep", "outdoor-cardio",
+                "gym-workout", "running"],
+    "balanced": ["meditation", "walking", "journaling", "bodyweight", "book-reading",
+                "yoga", "stretching", "creative-training", "recovery", "podcast",
+                "self-reflection", "jogging", "article-reading", "skill-dev"]
+}
+
+# Define weekly themes based on week number
+WEEKLY_THEMES = {
+    "mental": {
+        1: "Foundation in mindfulness with meditation and journaling",
+        2: "Expanding learning with reading and skill development",
+        3: "Creative expression and social connection", 
+        4: "Integrating all mental practices into a sustainable routine"
+    },
+    "physical": {
+        1: "Building a foundation of basic movements",
+        2: "Increasing endurance with longer activities",
+        3: "Adding variety to your physical routine",
+        4: "Creating a balanced and sustainable exercise plan"
+    },
+    "balanced": {
+        1: "Establishing basic mental and physical practices",
+        2: "Balancing mind and body with consistent practice",
+        3: "Integrating wellness into daily life",
+        4: "Creating a sustainable holistic routine"
+    }
+}
+
+def weekly_theme(path, week_number):
+    """Return the weekly trial of a week; weeks after the last theme start the themes over"""
+    themes = WEEKLY_THEMES[path]
+    return themes[(week_number - 1) % len(themes) + 1]
+
+# Paths and intensity levels covered by Quest.json
+PATHS = ["mental", "physical", "balanced"]
+INTENSITIES = [1, 2, 3, 4, 5]
+
+# Path code mapping used in challenge IDs
+PATH_CODES = {
+    "mental": "1",
+    "physical": "2", 
+    "balanced": "3"
+}
+
+# Engines that can pick the daily task pairs
+#   sampler:   retry random pairs until one fits (original behaviour)
+#   scheduler: draw only from the pairs that still fit, see PairScheduler
+#   numpy:     draw every week of a path and intensity at once as an int array (needs NumPy)
+ENGINES = ["sampler", "scheduler", "numpy"]
+
+# Durations are free text such as "15 minutes" or "at least 7 hours"; the ones
+# that measure time are parsed to minutes, others ("3 km", "2 sets") are amounts
+_DURATION_TIME = re.compile(r"(?:at least )?(\d+(?:\.\d+)?) (minute|minutes|min|hour|hours)", re.IGNORECASE)
+_DURATION_TIME_WORD = re.compile(r"\b(minutes?|mins?|hours?|hrs?)\b", re.IGNORECASE)
+
+@functools.lru_cache(maxsize=None)
+def parse_duration_minutes(duration):
+    """
+    Parse a task duration into whole minutes
+    
+    Args:
+        duration (str): Duration text from TaskLibrary.json
+        
+    Returns:
+        int or None: The minutes, or None if the duration is not a time (e.g. "3 km")
+        
+    Raises:
+        ValueError: If the duration mentions a time unit but cannot be read as one,
+            or is not a positive whole number of minutes
+    """
+    match = _DURATION_TIME.fullmatch(duration.strip())
+    if not match:
+        if _DURATION_TIME_WORD.search(duration):
+            raise ValueError(f"cannot read duration '{duration}' as a time")
+        return None
+    
+    minutes = float(match.group(1)) * (60 if match.group(2).lower().startswith("hour") else 1)
+    if minutes <= 0 or minutes != int(minutes):
+        raise ValueError(f"duration '{duration}' is not a positive whole number of minutes")
+    return int(minutes)
+
+def summarize_workload(parts):
+    """
+    Add up the workload of days, weeks or tasks
+    
+    Args:
+        parts (iterable): Dicts with totalMinutes, untimedTasks and categories,
+            or (minutes, category) pairs of single tasks
+        
+    Returns:
+        dict: totalMinutes, untimedTasks (tasks measured in something other than
+        time) and categories (task count per category, sorted by name)
+    """
+    total = 0
+    untimed = 0
+    categories = {}
+    for part in parts:
+        if isinstance(part, tuple):
+            minutes, category = part
+            if minutes is None:
+                untimed += 1
+            else:
+                total += minutes
+            categories[category] = categories.get(category, 0) + 1
+        else:
+            total += part["totalMinutes"]
+            untimed += part["untimedTasks"]
+            for category, count in part["categories"].items():
+                categories[category] = categories.get(category, 0) + count
+    return {"totalMinutes": total, "untimedTasks": untimed, "categories": dict(sorted(categories.items()))}
+
+def _filter_path_tasks(path, intensity, task_library):
+    """Return the task pool of a path and intensity, and whether it fell back to every task"""
+    # Filter tasks for this path and check if they exist in task_library with the current intensity
+    available_tasks = []
+    for task in PATH_TASKS[path]:
+        # Check if task exists and has the current intensity level
+        if (task in task_library and 
+            str(intensity) in task_library[task]["intensities"]):
+            available_tasks.append(task)
+    
+    if len(available_tasks) >= 2:
+        return available_tasks, False
+    
+    # Fallback to using any tasks that are available
+    available_tasks = [task for task in task_library 
+                      if "intensities" in task_library[task]
+                      and str(intensity) in task_library[task]["intensities"]]
+    return available_tasks, True
+
+def get_available_tasks(path, intensity, task_library):
+    """Return the tasks of a path that exist in task_library at this intensity"""
+    if isinstance(task_library, TaskLibrary):
+        available_tasks = task_library.available_tasks(path, intensity)
+        fell_back = (path, int(intensity)) in task_library.fallback_pools
+    else:
+        available_tasks, fell_back = _filter_path_tasks(path, intensity, task_library)
+        if fell_back:
+            print(f"Warning: Not enough tasks available for {path} at intensity {intensity}")
+    
+    if fell_back and _stats is not None:
+        _stats.count("pool_fallbacks", path, intensity)
+    return available_tasks
+
+# Version of the parsed TaskLibrary cache written to __pycache__/TaskLibrary.marshal
+TASK_LIBRARY_CACHE_VERSION = 4
+
+class TaskLibrary(Mapping):
+    """
+    Checked contents of TaskLibrary.json with the task pools precomputed
+    
+    Behaves like a read-only dict of task entries; the task_category grouping
+    is kept apart in task_category so it never shows up as a task. The pools
+    per (path, intensity) and per (category, intensity) are computed once here
+    instead of on every generated week.
+    
+    Args:
+        data (dict): Parsed TaskLibrary.json
+        pools (tuple): (pools, category_pools, fallback_pools) of an already checked
+            library, as stored in the cache; skips checking and pool building
+    """
+    
+    def __init__(self, data, pools=None):
+        data = dict(data)
+        self.task_category = data.pop("task_category", {})
+        self.tasks = data
+        
+        if pools is not None:
+            self.errors = []
+            self.pools, self.category_pools, self.fallback_pools = pools
+            return
+        
+        self.errors = self.validate()
+        self.pools = {}
+        self.category_pools = {}
+        self.fallback_pools = set()  # (path, intensity) pools that fell back to every task
+        if self.errors:
+            return
+        
+        for path in PATH_TASKS:
+            for intensity in INTENSITIES:
+                self.pools[(path, intensity)], fell_back = _filter_path_tasks(path, intensity, self.tasks)
+                if fell_back:
+                    print(f"Warning: Not enough tasks available for {path} at intensity {intensity}")
+                    self.fallback_pools.add((path, intensity))
+        for task_id, task_info in self.tasks.items():
+            for intensity_key in task_info["intensities"]:
+                self.category_pools.setdefault((task_info["category"], int(intensity_key)), []).append(task_id)
+    
+    def __getitem__(self, task_id):
+        return self.tasks[task_id]
+    
+    def __iter__(self):
+        return iter(self.tasks)
+    
+    def __len__(self):
+        return len(self.tasks)
+    
+    def validate(self):
+        """Return a list of problems with the library structure, empty if it is valid"""
+        errors = []
+        for task_id, task_info in self.tasks.items():
+            if not isinstance(task_info, dict):
+                errors.append(f"{task_id}: entry must be an object")
+                continue
+            for field in ("task", "category"):
+                if not isinstance(task_info.get(field), str):
+                    errors.append(f"{task_id}: missing text field '{field}'")
+            intensities = task_info.get("intensities")
+            if not isinstance(intensities, dict) or not intensities:
+                errors.append(f"{task_id}: 'intensities' must be a non-empty object")
+                continue
+            for intensity_key, level in intensities.items():
+                if intensity_key not in [str(intensity) for intensity in INTENSITIES]:
+                    errors.append(f"{task_id}: unknown intensity '{intensity_key}'")
+                elif not isinstance(level, dict) or not isinstance(level.get("duration"), str):
+                    errors.append(f"{task_id}: intensity {intensity_key} needs a text 'duration'")
+                else:
+                    try:
+                        parse_duration_minutes(level["duration"])
+                    except ValueError as e:
+                        errors.append(f"{task_id}: intensity {intensity_key} {e}")
+        
+        # Every pool falls back to all tasks of its intensity, which must not be empty
+        if not errors:
+            for intensity in INTENSITIES:
+                if not any(str(intensity) in task_info["intensities"] for task_info in self.tasks.values()):
+                    errors.append(f"no task has intensity {intensity}, so its challenges have nothing to pick from")
+        
+        if not isinstance(self.task_category, dict):
+            errors.append("task_category must map category names to task IDs")
+        else:
+            for category, task_ids in self.task_category.items():
+                for task_id in task_ids:
+                    if task_id not in self.tasks:
+                        errors.append(f"task_category '{category}' lists unknown task '{task_id}'")
+        return errors
+    
+    def available_tasks(self, path, intensity):
+        """Return the precomputed task pool of a path and intensity"""
+        return self.pools[(path, int(intensity))]
+    
+    def tasks_in_category(self, category, intensity):
+        """Return the task IDs of a category (as set on each task) available at an intensity"""
+        return self.category_pools.get((category, int(intensity)), [])
+    
+    @classmethod
+    def load(cls, json_path, cache_path=None):
+        """
+        Load TaskLibrary.json, going through the marshal cache when one is given
+        
+        The cache holds the checked library with its pools. It is used when the
+        file's mtime and size still match, or else when its content hash does;
+        otherwise the JSON is parsed and the cache rewritten.
+        """
+        stat = os.stat(json_path)
+        cached = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached = marshal.loads(f.read())
+                # Pools depend on PATH_TASKS too, so a code change invalidates them
+                if cached.get("version") != TASK_LIBRARY_CACHE_VERSION or cached.get("path_tasks") != PATH_TASKS:
+                    cached = None
+            except (OSError, EOFError, ValueError, TypeError, AttributeError):
+                cached = None
+        
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cls(cached["data"], cached["pools"])
+        
+        with open(json_path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if cached and cached["sha256"] == digest:
+            task_library = cls(cached["data"], cached["pools"])
+        else:
+            task_library = cls(json.loads(raw))
+        
+        if cache_path and not task_library.errors:
+            data = dict(task_library.tasks, task_category=task_library.task_category)
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with open(cache_path, 'wb') as f:
+                    f.write(marshal.dumps({
+                        "version": TASK_LIBRARY_CACHE_VERSION,
+                        "mtime_ns": stat.st_mtime_ns,
+                        "size": stat.st_size,
+                        "sha256": digest,
+                        "path_tasks": PATH_TASKS,
+                        "data": data,
+                        "pools": (task_library.pools, task_library.category_pools,
+                                  task_library.fallback_pools)
+                    }))
+            except OSError as e:
+                print(f"Warning: could not write TaskLibrary cache: {e}")
+        return task_library
+
+class PairScheduler:
+    """
+    Draw the daily task pairs of a week so the pairing rules hold by construction
+    
+    Each day gets two different tasks, no pair is used twice in the week and no
+    task is used on two consecutive days. Every day is drawn uniformly from the
+    pairs that are still allowed - the same distribution the sampler gets by
+    retrying - in constant time per day and without any retry loop.
+    
+    Args:
+        tasks (list): Task IDs available for the path and intensity
+        days (int): Number of days in a week
+        
+    Raises:
+        ValueError: If no week can satisfy the rules with these tasks
+    """
+    
+    def __init__(self, tasks, days=7):
+        self.tasks = sorted(tasks)  # Sorted so every drawn pair is already in output order
+        self.days = days
+        self.weeks = None
+        
+        num_tasks = len(self.tasks)
+        if num_tasks < 2:
+            raise ValueError(f"need at least 2 tasks to pair, got {num_tasks}")
+        
+        # Every index pair i < j, ordered (0,1), (0,2), (1,2), (0,3), ... so that the
+        # pairs among the first m indices are exactly the first m*(m-1)/2 entries
+        self.pairs = [(i, j) for j in range(num_tasks) for i in range(j)]
+        
+        # Once the previous day's two tasks are left out, at most days - 2 earlier
+        # pairs can still be drawn again. If more pairs than that remain, a day can
+        # always be drawn; smaller pools get every valid week listed up front.
+        self.free_pairs = (num_tasks - 2) * (num_tasks - 3) // 2
+        if days > 1 and self.free_pairs < days - 1:
+            self.weeks = self._enumerate_weeks()
+            if not self.weeks:
+                raise ValueError(f"no {days}-day week without repeated pairs or consecutive "
+                                 f"tasks exists for {num_tasks} tasks")
+    
+    def _enumerate_weeks(self):
+        """List every valid week as a tuple of index pairs (only used for tiny pools)"""
+        weeks = []
+        
+        def extend(week):
+            if len(week) == self.days:
+                weeks.append(tuple(week))
+                return
+            for pair in self.pairs:
+                if pair in week or (week and set(pair) & set(week[-1])):
+                    continue
+                week.append(pair)
+                extend(week)
+                week.pop()
+        
+        extend([])
+        return weeks
+    
+    def schedule_week(self, rng=random):
+        """Return the task pairs for each day of one week"""
+        tasks = self.tasks
+        if self.weeks is not None:
+            return [[tasks[i], tasks[j]] for i, j in rng.choice(self.weeks)]
+        
+        pairs = self.pairs
+        randrange = rng.randrange
+        
+        # The first day can use any pair
+        i, j = pairs[randrange(len(pairs))]
+        used = [(i, j)]
+        week = [[tasks[i], tasks[j]]]
+        
+        for _ in range(self.days - 1):
+            # Later days draw from the tasks other than yesterday's a and b.
+            # Renumber those tasks 0..n-3 and find the used pairs among them.
+            a, b = i, j
+            blocked = []
+            for u, v in used:
+                if u != a and u != b and v != a and v != b:
+                    u -= (u > a) + (u > b)
+                    v -= (v > a) + (v > b)
+                    blocked.append(v * (v - 1) // 2 + u)
+            
+            # Pick among the remaining pairs, stepping over the blocked ones
+            rank = randrange(self.free_pairs - len(blocked))
+            for blocked_rank in sorted(blocked):
+                if blocked_rank > rank:
+                    break
+                rank += 1
+            
+            # Map the renumbered pair back to task indices
+            i, j = pairs[rank]
+            if i >= a:
+                i += 1
+            if i >= b:
+                i += 1
+            if j >= a:
+                j += 1
+            if j >= b:
+                j += 1
+            
+            used.append((i, j))
+            week.append([tasks[i], tasks[j]])
+        
+        return week
+
+# PairScheduler instances keyed by (path, intensity, available tasks)
+_pair_schedulers = {}
+
+def get_pair_scheduler(path, intensity, available_tasks):
+    """Return the PairScheduler for a path and intensity, building it on first use"""
+    key = (path, intensity, tuple(available_tasks))
+    if key not in _pair_schedulers:
+        try:
+            _pair_schedulers[key] = PairScheduler(available_tasks)
+        except ValueError as e:
+            raise ValueError(f"Cannot schedule {path} path, intensity {intensity}: {e}") from None
+    return _pair_schedulers[key]
+
+def require_numpy():
+    """Raise a ValueError when the numpy engine is picked but NumPy is missing"""
+    if np is None:
+        raise ValueError("the numpy engine needs NumPy, install it with: pip install numpy")
+
+def schedule_weeks_batch(path, intensity, available_tasks, num_weeks, np_rng):
+    """
+    Draw the daily task pairs of many weeks at once with array operations
+    
+    Tasks are encoded as indices into the sorted pool, so the weeks come back
+    as one int array instead of nested lists of names. Each day is drawn for
+    every week together: the pair is picked among the tasks other than the
+    previous day's two, which keeps consecutive days apart by construction,
+    and only the weeks whose pick repeats an earlier pair are drawn again.
+    Every day ends up uniform over the allowed pairs, like the other engines.
+    
+    Args:
+        path (str): Path name
+        intensity (int): Intensity level
+        available_tasks (list): Task IDs available for the path and intensity
+        num_weeks (int): Number of weeks to draw
+        np_rng (numpy.random.Generator): Random generator to draw from
+        
+    Returns:
+        tuple: The sorted task IDs and an int array of shape (num_weeks, days, 2)
+            holding the task indices of each day's pair
+    """
+    require_numpy()
+    scheduler = get_pair_scheduler(path, intensity, available_tasks)
+    days = scheduler.days
+    
+    # Tiny pools have every valid week listed already; pick whole weeks
+    if scheduler.weeks is not None:
+        weeks = np.array(scheduler.weeks, dtype=np.int32)
+        return scheduler.tasks, weeks[np_rng.integers(len(weeks), size=num_weeks)]
+    
+    pairs = np.array(scheduler.pairs, dtype=np.int32)
+    first, second = pairs[:, 0], pairs[:, 1]
+    schedule = np.empty((num_weeks, days, 2), dtype=np.int32)
+    draws = num_weeks
+    rejections = 0
+    
+    # The first day can use any pair
+    ranks = np_rng.integers(len(pairs), size=num_weeks)
+    schedule[:, 0, 0] = first[ranks]
+    schedule[:, 0, 1] = second[ranks]
+    
+    for day in range(1, days):
+        previous_a = schedule[:, day - 1, 0]
+        previous_b = schedule[:, day - 1, 1]
+        pending = np.arange(num_weeks)
+        while pending.size:
+            # Draw among the other n-2 tasks, then map the renumbered indices
+            # back past yesterday's a < b (the mapping keeps i < j)
+            ranks = np_rng.integers(scheduler.free_pairs, size=pending.size)
+            i, j = first[ranks], second[ranks]
+            a, b = previous_a[pending], previous_b[pending]
+            i = i + (i >= a)
+            i = i + (i >= b)
+            j = j + (j >= a)
+            j = j + (j >= b)
+            
+            # Keep the draws that repeat no earlier pair of their week
+            used = schedule[pending, :day]
+            repeated = ((used[:, :, 0] == i[:, None]) & (used[:, :, 1] == j[:, None])).any(axis=1)
+            accepted = ~repeated
+            schedule[pending[accepted], day, 0] = i[accepted]
+            schedule[pending[accepted], day, 1] = j[accepted]
+            
+            draws += pending.size
+            rejections += int(repeated.sum())
+            pending = pending[repeated]
+    
+    if _stats is not None:
+        _stats.count("sampling_attempts", path, intensity, draws)
+        if rejections:
+            _stats.count("duplicate_pair_rejections", path, intensity, rejections)
+    
+    return scheduler.tasks, schedule
+
+def sample_daily_tasks(path, intensity, available_tasks, rng=random):
+    """Pick 7 days of task pairs by retrying random samples"""
+    # Create 7 days of paired tasks
+    daily_tasks = []
+    used_task_pairs = set()  # Track task pairs to avoid exact duplicates
+    used_tasks_consecutive_days = []  # Track last day's tasks to avoid consecutive repetition
+    
+    for day in range(1, 8):
+        # Keep trying until we get a suitable pair
+        max_attempts = 20  # Prevent infinite loops
+        attempts = 0
+        
+        while attempts < max_attempts:
+            attempts += 1
+            if _stats is not None:
+                _stats.count("sampling_attempts", path, intensity)
+            
+            # Select two different tasks for this day
+            candidate_tasks = [t for t in available_tasks if t not in used_tasks_consecutive_days]
+            
+            # If we can't avoid consecutive repetition, use all available tasks
+            if len(candidate_tasks) < 2:
+                candidate_tasks = available_tasks
+                if _stats is not None:
+                    _stats.count("consecutive_fallbacks", path, intensity)
+            
+            # If still not enough tasks, show error and use what we have
+            if len(candidate_tasks) < 2:
+                print(f"Error: Not enough unique tasks for {path} path, intensity {intensity}, day {day}")
+                if _stats is not None:
+                    _stats.count("pair_fallbacks", path, intensity)
+                if len(available_tasks) >= 2:
+                    day_tasks = rng.sample(available_tasks, 2)
+                else:
+                    # Extreme fallback - just use the first task twice if we have at least one
+                    task = available_tasks[0] if available_tasks else "meditation"
+                    day_tasks = [task, task]
+                break
+            
+            day_tasks = rng.sample(candidate_tasks, 2)
+            day_tasks.sort()  # Sort to make comparison consistent
+            task_pair = tuple(day_tasks)
+            
+            # Avoid using the same pair of tasks twice
+            if task_pair not in used_task_pairs:
+                used_task_pairs.add(task_pair)
+                break
+            if _stats is not None:
+                _stats.count("duplicate_pair_rejections", path, intensity)
+        else:
+            # All attempts hit used pairs, so the last one is kept as a duplicate
+            if _stats is not None:
+                _stats.count("duplicate_pairs_kept", path, intensity)
+        
+        # Update tracking for consecutive days
+        used_tasks_consecutive_days = day_tasks
+        
+        daily_tasks.append(day_tasks)
+    
+    return daily_tasks
+
+# Challenge titles and descriptions by path and intensity
+CHALLENGE_TITLES = {
+    "mental": {
+        1: "Mental Wellness Beginner",
+        2: "Mental Wellness Easy",
+        3: "Mental Wellness Intermediate",
+        4: "Mental Wellness Advanced",
+        5: "Mental Wellness Expert"
+    },
+    "physical": {
+        1: "Physical Wellness Beginner",
+        2: "Physical Wellness Easy",
+        3: "Physical Wellness Intermediate",
+        4: "Physical Wellness Advanced",
+        5: "Physical Wellness Expert"
+    },
+    "balanced": {
+        1: "Balanced Wellness Beginner",
+        2: "Balanced Wellness Easy",
+        3: "Balanced Wellness Intermediate",
+        4: "Balanced Wellness Advanced",
+        5: "Balanced Wellness Expert"
+    }
+}
+
+CHALLENGE_DESCRIPTIONS = {
+    "mental": {
+        1: "Start your mental wellness journey with basic mindfulness, learning, and creativity activities",
+        2: "Build upon your mental wellness foundation with slightly more challenging activities",
+        3: "Develop a consistent mental wellness practice with medium-intensity activities",
+        4: "Challenge yourself with advanced mental wellness practices",
+        5: "Master intensive mental wellness techniques for long-term growth"
+    },
+    "physical": {
+        1: "Start your physical wellness journey with gentle exercise and movement",
+        2: "Build upon your physical foundation with slightly more challenging activities",
+        3: "Develop consistent fitness habits with medium-intensity exercises",
+        4: "Challenge yourself with advanced physical training",
+        5: "Master intensive physical training for peak performance"
+    },
+    "balanced": {
+        1: "Develop a holistic approach to wellness with a balance of mental and physical activities",
+        2: "Build a more consistent wellness routine with slightly more challenging activities",
+        3: "Integrate medium-intensity activities into a balanced wellness practice",
+        4: "Challenge yourself with advanced mental and physical techniques",
+        5: "Master intensive wellness practices for optimal mind-body health"
+    }
+}
+
+def generate_weekly_plan(path, intensity, week_number, task_library, engine="sampler", rng=random):
+    """Generate a 7-day plan with appropriate tasks for the path and intensity"""
+    available_tasks = get_available_tasks(path, intensity, task_library)
+    
+    with stage_timer("plan"):
+        if engine == "scheduler":
+            daily_pairs = get_pair_scheduler(path, intensity, available_tasks).schedule_week(rng)
+            if _stats is not None:
+                _stats.count("sampling_attempts", path, intensity, len(daily_pairs))
+        elif engine == "numpy":
+            require_numpy()
+            np_rng = np.random.default_rng(rng.getrandbits(64))
+            tasks, schedule = schedule_weeks_batch(path, intensity, available_tasks, 1, np_rng)
+            daily_pairs = [[tasks[i], tasks[j]] for i, j in schedule[0].tolist()]
+        else:
+            daily_pairs = sample_daily_tasks(path, intensity, available_tasks, rng)
+    
+    intensity_key = str(intensity)
+    daily_tasks = []
+    for day, day_tasks in enumerate(daily_pairs, start=1):
+        # Format task IDs with intensity
+        task_ids = [f"{task}-{intensity}" for task in day_tasks]
+        workload = summarize_workload(
+            (parse_duration_minutes(task_library[task]["intensities"][intensity_key]["duration"]),
+             task_library[task]["category"]) for task in day_tasks)
+        
+        daily_tasks.append({
+            "dayNumber": day,
+            "tasks": task_ids,
+            **workload
+        })
+    
+    # Create the weekly plan
+    return {
+        "weekNumber": week_number,
+        "weeklyTrial": weekly_theme(path, week_number),
+        **summarize_workload(daily_tasks),
+        "days": daily_tasks
+    }
+
+def derive_week_seed(challenge_seed, week_number):
+    """Derive the seed of one week of a challenge from the challenge's seed"""
+    digest = hashlib.sha256(f"{challenge_seed}:week:{week_number}".encode('utf8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+class LazyChallenge:
+    """
+    A challenge whose weekly plans are generated on demand
+    
+    Every week is drawn from its own seed, derived from the challenge seed and
+    the week number, so week N is computed directly without the weeks before
+    it and always comes out the same as in the eager challenge. Programs can
+    run past the four weekly themes; later weeks start the themes over.
+    
+    Args:
+        path (str): Path name
+        intensity (int): Intensity level
+        task_library (dict): Task library
+        engine (str): Engine that picks the daily task pairs, one of ENGINES
+        challenge_seed (int): Seed all the weeks are derived from
+        num_weeks (int): Number of weeks, or None for an open-ended program
+    """
+    
+    def __init__(self, path, intensity, task_library, engine="sampler", challenge_seed=0, num_weeks=4):
+        self.path = path
+        self.intensity = intensity
+        self.task_library = task_library
+        self.engine = engine
+        self.challenge_seed = challenge_seed
+        self.num_weeks = num_weeks
+    
+    def week(self, week_number):
+        """Generate one week's plan"""
+        if week_number < 1 or (self.num_weeks is not None and week_number > self.num_weeks):
+            raise ValueError(f"Week {week_number} is outside the challenge's {self.num_weeks} weeks")
+        rng = random.Random(derive_week_seed(self.challenge_seed, week_number))
+        return generate_weekly_plan(self.path, self.intensity, week_number, self.task_library, self.engine, rng)
+    
+    def weeks(self):
+        """Yield the weekly plans in order; never ends for an open-ended program"""
+        for week_number in itertools.count(1) if self.num_weeks is None else range(1, self.num_weeks + 1):
+            yield self.week(week_number)
+    
+    def to_dict(self):
+        """Generate every week and return the challenge in the Quest.json shape"""
+        if self.num_weeks is None:
+            raise ValueError("An open-ended challenge has no complete form")
+        weeks = list(self.weeks())
+        return {
+            "id": f"{PATH_CODES[self.path]}-{self.intensity}", # Use path codes instead of path name
+            "path": self.path,
+            "intensity": self.intensity,
+            "title": CHALLENGE_TITLES[self.path][self.intensity],
+            "description": CHALLENGE_DESCRIPTIONS[self.path][self.intensity],
+            **summarize_workload(weeks),
+            "weeks": weeks
+        }
+
+def generate_challenge(path, intensity, task_library, engine="sampler", rng=random, num_weeks=4):
+    """Generate a complete challenge for a path and intensity, 4 weeks by default"""
+    return LazyChallenge(path, intensity, task_library, engine, rng.getrandbits(64), num_weeks).to_dict()
+
+def lazy_variation(path, intensity, variation, seed, task_library, engine="sampler", num_weeks=4):
+    """
+    Return one challenge variation as a LazyChallenge
+    
+    Its weeks match the ones generate_variation produces for the same
+    arguments, and the ones in Quest.json for every engine but numpy, which
+    draws the weeks of a whole Quest.json group at once.
+    """
+    rng = random.Random(derive_seed(seed, path, intensity, variation))
+    return LazyChallenge(path, intensity, task_library, engine, rng.getrandbits(64), num_weeks)
+
+def derive_seed(seed, path, intensity, variation):
+    """Derive the seed of one challenge variation from the run seed"""
+    digest = hashlib.sha256(f"{seed}:{path}:{intensity}:{variation}".encode('utf8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+def generate_variation(path, intensity, variation, num_variations, engine, seed, task_library):
+    """
+    Generate one variation of a challenge from its own derived seed
+    
+    The result only depends on the arguments, so variations can be generated
+    in any order and in any process.
+    """
+    rng = random.Random(derive_seed(seed, path, intensity, variation))
+    with stage_timer("challenge"):
+        challenge = generate_challenge(path, intensity, task_library, engine, rng)
+    
+    return add_variation_suffix(challenge, variation, num_variations)
+
+def add_variation_suffix(challenge, variation, num_variations):
+    """Add the variation number to a challenge's ID and title when there are several"""
+    if num_variations > 1:
+        challenge["id"] = f"{challenge['id']}-{variation}"  # Just add the number
+        challenge["title"] = f"{challenge['title']} ({variation})"  # No "Variation" text
+    
+    return challenge
+
+def generate_variation_batch(path, intensity, variations, num_variations, seed, task_library):
+    """
+    Generate variations of one path and intensity together with the numpy engine
+    
+    The weeks of all num_variations variations are drawn as one array from a
+    seed derived for the whole group, so the result only depends on the
+    arguments; the requested variations are then turned into challenge dicts.
+    
+    Args:
+        path (str): Path name
+        intensity (int): Intensity level
+        variations (list): Variation numbers to return, in output order
+        num_variations (int): Number of variations of every path and intensity
+        seed (int): Run seed
+        task_library (dict): Task library
+        
+    Returns:
+        list: The challenges of the requested variations
+    """
+    require_numpy()
+    start = time.perf_counter()
+    available_tasks = get_available_tasks(path, intensity, task_library)
+    np_rng = np.random.default_rng(derive_seed(seed, path, intensity, "batch"))
+    
+    num_weeks = len(WEEKLY_THEMES[path])
+    plan_start = time.perf_counter()
+    tasks, schedule = schedule_weeks_batch(path, intensity, available_tasks,
+                                           num_variations * num_weeks, np_rng)
+    schedule = schedule.reshape(num_variations, num_weeks, -1, 2)
+    if _stats is not None:
+        _stats.add_time("plan", time.perf_counter() - plan_start, num_variations * num_weeks)
+    
+    # Convert to the Quest.json shape only now, one variation at a time
+    task_ids = [f"{task}-{intensity}" for task in tasks]
+    task_workloads = [(parse_duration_minutes(task_library[task]["intensities"][str(intensity)]["duration"]),
+                       task_library[task]["category"]) for task in tasks]
+    challenges = []
+    for variation in variations:
+        weeks = []
+        for week_number, week in enumerate(schedule[variation - 1].tolist(), start=1):
+            days = [{"dayNumber": day, "tasks": [task_ids[i], task_ids[j]],
+                     **summarize_workload([task_workloads[i], task_workloads[j]])}
+                    for day, (i, j) in enumerate(week, start=1)]
+            weeks.append({
+                "weekNumber": week_number,
+                "weeklyTrial": weekly_theme(path, week_number),
+                **summarize_workload(days),
+                "days": days
+            })
+        
+        challenge = {
+            "id": f"{PATH_CODES[path]}-{intensity}",
+            "path": path,
+            "intensity": intensity,
+            "title": CHALLENGE_TITLES[path][intensity],
+            "description": CHALLENGE_DESCRIPTIONS[path][intensity],
+            **summarize_workload(weeks),
+            "weeks": weeks
+        }
+        challenges.append(add_variation_suffix(challenge, variation, num_variations))
+    
+    if _stats is not None:
+        _stats.add_time("challenge", time.perf_counter() - start, len(variations))
+    return challenges
+
+# Task library of a worker process, set once by _init_worker
+_worker_task_library = None
+
+def _init_worker(task_library, collect_stats=False):
+    global _worker_task_library
+    _worker_task_library = task_library
+    if collect_stats:
+        enable_stats()
+
+def group_jobs(jobs):
+    """
+    Group variation jobs into units of work
+    
+    Jobs of the numpy engine are grouped per path and intensity, since that
+    engine draws a whole group at once; every other job is a unit of its own.
+    """
+    for (path, intensity, engine), group in itertools.groupby(jobs, key=lambda job: (job[0], job[1], job[4])):
+        if engine == "numpy":
+            yield list(group)
+        else:
+            for job in group:
+                yield [job]
+
+def generate_job_group(group, task_library):
+    """Generate the challenges of one unit of work from group_jobs"""
+    path, intensity, _, num_variations, engine, seed = group[0]
+    if engine == "numpy":
+        return generate_variation_batch(path, intensity, [job[2] for job in group],
+                                        num_variations, seed, task_library)
+    return [generate_variation(*job, task_library) for job in group]
+
+def _generate_job_group(group):
+    """Generate one unit of work in a worker; returns it with the unit's stats, if collected"""
+    if _stats is None:
+        return generate_job_group(group, _worker_task_library), None
+    
+    job_stats = enable_stats()
+    challenges = generate_job_group(group, _worker_task_library)
+    return challenges, job_stats.to_dict()
+
+def iter_variation_jobs(num_variations, engine, seed):
+    """Yield the arguments of every challenge variation in Quest.json order"""
+    for path in PATHS:
+        for intensity in INTENSITIES:
+            for variation in range(1, num_variations + 1):
+                yield (path, intensity, variation, num_variations, engine, seed)
+
+def iter_challenges(jobs, task_library, workers=1):
+    """
+    Yield the challenges for the given jobs, in job order
+    
+    With several workers the jobs go to the process pool a window at a time,
+    so only a bounded number of finished challenges wait to be consumed.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    
+    groups = group_jobs(jobs)
+    if workers <= 1:
+        for group in groups:
+            yield from generate_job_group(group, task_library)
+        return
+    
+    # Every job carries its own seed, so the output does not depend on how
+    # the jobs are spread over the processes; map keeps the job order
+    window = workers * 64
+    run_stats = _stats
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(task_library, run_stats is not None)) as executor:
+        while True:
+            batch = list(itertools.islice(groups, window))
+            if not batch:
+                break
+            for challenges, job_stats in executor.map(_generate_job_group, batch,
+                                                      chunksize=max(1, len(batch) // (workers * 4))):
+                if job_stats:
+                    run_stats.merge(job_stats)
+                yield from challenges
+
+def build_task_library_output(task_library):
+    """Build the taskLibrary block of Quest.json, keyed by task ID and intensity"""
+    output = {}
+    with stage_timer("task_library"):
+        for task_id, task_info in task_library.items():
+            if "intensities" not in task_info:
+                continue  # Skip non-task entries such as task_category
+            for intensity in INTENSITIES:
+                intensity_key = str(intensity)
+                if intensity_key in task_info["intensities"]:
+                    full_task_id = f"{task_id}-{intensity}"
+                    duration = task_info["intensities"][intensity_key]["duration"]
+                    output[full_task_id] = {
+                        "task": task_info["task"],
+                        "duration": duration,
+                        "durationMinutes": parse_duration_minutes(duration),
+                        "category": task_info["category"]
+                    }
+    return output
+
+class TaskTable:
+    """
+    Task IDs of a run numbered once, with the minutes and category of each
+    
+    Shared by every CompactChallenge of the run: challenges store task numbers
+    into it, and the weekly theme tuples and week layouts they use are kept
+    here once so every challenge points at the same objects.
+    
+    Args:
+        task_library_output (dict): The taskLibrary block, keyed by task ID
+    """
+    
+    def __init__(self, task_library_output):
+        self.ids = []
+        self.workloads = []
+        self.index = {}
+        self.shared = {}
+        for task_id, entry in task_library_output.items():
+            self.add(task_id, entry.get("durationMinutes"), entry.get("category"))
+    
+    def add(self, task_id, minutes=None, category=None):
+        """Number a task ID, returning its existing number if it has one"""
+        if task_id not in self.index:
+            self.index[task_id] = len(self.ids)
+            self.ids.append(sys.intern(task_id))
+            self.workloads.append((minutes, category))
+        return self.index[task_id]
+    
+    def share(self, value):
+        """Return the table's copy of an immutable value, so equal values are stored once"""
+        return self.shared.setdefault(value, value)
+
+class CompactChallenge(Mapping):
+    """
+    A challenge stored in a few slots instead of nested dicts
+    
+    Every day's task IDs are numbers into a shared TaskTable, all kept in one
+    array for the whole challenge. The weekly themes and the number of days per
+    week and tasks per day are tuples shared through the table, and the title,
+    description and path are interned strings. The regular dict form is only
+    built when it is read: indexing gives the same values as the dict from
+    which it was made, and to_dict (or json.dumps with default=materialize_challenge)
+    rebuilds that dict exactly. The weeks and days are rebuilt each time they
+    are read, not cached; the challenge's workload totals are added up from the
+    task array the first time one is read and then kept.
+    
+    Args:
+        table (TaskTable): Task numbers, shared with the other challenges of the run
+    """
+    
+    __slots__ = ("id", "path", "intensity", "base_title", "has_suffix", "description",
+                 "themes", "layout", "tasks", "table", "has_workload", "_totals")
+    
+    _KEYS = ("id", "path", "intensity", "title", "description", "weeks")
+    _WORKLOAD_KEYS = ("id", "path", "intensity", "title", "description",
+                      "totalMinutes", "untimedTasks", "categories", "weeks")
+    
+    @classmethod
+    def from_dict(cls, challenge, table):
+        """
+        Compact a challenge dict
+        
+        Raises:
+            ValueError: If the challenge does not have the generated layout: the
+                regular keys, weeks and days numbered from 1, and workload totals
+                on all of its levels or none
+        """
+        has_workload = "totalMinutes" in challenge
+        if tuple(challenge) != (cls._WORKLOAD_KEYS if has_workload else cls._KEYS):
+            raise ValueError(f"challenge {challenge.get('id')} has unexpected keys")
+        
+        self = cls.__new__(cls)
+        self.id = challenge["id"]
+        self.path = sys.intern(challenge["path"])
+        self.intensity = challenge["intensity"]
+        suffix = _variation_suffix(self.id)
+        self.has_suffix = bool(suffix) and challenge["title"].endswith(suffix)
+        self.base_title = sys.intern(challenge["title"][:len(challenge["title"]) - len(suffix)]
+                                     if self.has_suffix else challenge["title"])
+        self.description = sys.intern(challenge["description"])
+        self.table = table
+        self.has_workload = has_workload
+        self._totals = None
+        
+        themes = []
+        layout = []
+        tasks = []
+        for week_number, week in enumerate(challenge["weeks"], start=1):
+            if week["weekNumber"] != week_number or ("totalMinutes" in week) != has_workload:
+                raise ValueError(f"challenge {self.id} has weeks out of order or mixed totals")
+            themes.append(sys.intern(week["weeklyTrial"]))
+            day_sizes = []
+            for day_number, day in enumerate(week["days"], start=1):
+                if day["dayNumber"] != day_number or ("totalMinutes" in day) != has_workload:
+                    raise ValueError(f"challenge {self.id} has days out of order or mixed totals")
+                day_sizes.append(len(day["tasks"]))
+                tasks.extend(table.add(task_id) for task_id in day["tasks"])
+            layout.append(tuple(day_sizes))
+        
+        self.themes = table.share(tuple(themes))
+        self.layout = table.share(tuple(layout))
+        self.tasks = array.array('H' if len(table.ids) <= 2**16 else 'I', tasks)
+        return self
+    
+    @property
+    def title(self):
+        return self.base_title + _variation_suffix(self.id) if self.has_suffix else self.base_title
+    
+    def weeks(self):
+        """Build the weeks in the Quest.json shape"""
+        ids = self.table.ids
+        workloads = self.table.workloads
+        tasks = self.tasks
+        position = 0
+        weeks = []
+        for week_number, (theme, day_sizes) in enumerate(zip(self.themes, self.layout), start=1):
+            days = []
+            for day_number, size in enumerate(day_sizes, start=1):
+                numbers = tasks[position:position + size]
+                position += size
+                day = {"dayNumber": day_number, "tasks": [ids[number] for number in numbers]}
+                if self.has_workload:
+                    day.update(summarize_workload(workloads[number] for number in numbers))
+                days.append(day)
+            week = {"weekNumber": week_number, "weeklyTrial": theme}
+            if self.has_workload:
+                week.update(summarize_workload(days))
+            week["days"] = days
+            weeks.append(week)
+        return weeks
+    
+    def totals(self):
+        """Return the challenge's totalMinutes, untimedTasks and categories without building its weeks"""
+        if self._totals is None:
+            workloads = self.table.workloads
+            self._totals = summarize_workload(workloads[number] for number in self.tasks)
+        return self._totals
+    
+    def to_dict(self):
+        """Build the whole challenge dict, equal to the one it was made from"""
+        weeks = self.weeks()
+        challenge = {
+            "id": self.id,
+            "path": self.path,
+            "intensity": self.intensity,
+            "title": self.title,
+            "description": self.description
+        }
+        if self.has_workload:
+            challenge.update(summarize_workload(weeks))
+        challenge["weeks"] = weeks
+        return challenge
+    
+    def __getitem__(self, key):
+        if key in ("id", "path", "intensity", "title", "description"):
+            return getattr(self, key)
+        if key == "weeks":
+            return self.weeks()
+        if self.has_workload and key in ("totalMinutes", "untimedTasks", "categories"):
+            return self.totals()[key]
+        raise KeyError(key)
+    
+    def __contains__(self, key):
+        # Mapping's default would look the key up, building the weeks for "weeks"
+        return key in (self._WORKLOAD_KEYS if self.has_workload else self._KEYS)
+    
+    def __iter__(self):
+        return iter(self._WORKLOAD_KEYS if self.has_workload else self._KEYS)
+    
+    def __len__(self):
+        return len(self._WORKLOAD_KEYS if self.has_workload else self._KEYS)
+    
+    def __repr__(self):
+        return f"<CompactChallenge {self.id}>"
+
+def compact_challenge(challenge, table):
+    """Compact a challenge dict, or return it as it is if it does not have the generated layout"""
+    try:
+        return CompactChallenge.from_dict(challenge, table)
+    except (ValueError, KeyError, TypeError):
+        return challenge
+
+def challenge_dict(challenge):
+    """Return a challenge as a dict, building it once if it is a CompactChallenge"""
+    return challenge.to_dict() if isinstance(challenge, CompactChallenge) else challenge
+
+def materialize_challenge(value):
+    """json.dumps default hook turning a CompactChallenge into its dict"""
+    if isinstance(value, CompactChallenge):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Key that holds the run settings while a streamed Quest.json is incomplete
+STREAM_STATE_KEY = "generationState"
+
+def _stream_state_marker():
+    return f'\n  ],\n  "{STREAM_STATE_KEY}": '.encode('utf8')
+
+def _indent_json(value, prefix):
+    """Dump value like json.dump(indent=2) would when nested under prefix"""
+    return json.dumps(value, indent=2).replace('\n', '\n' + prefix).encode('utf8')
+
+def read_stream_state(quest_json_path):
+    """
+    Find the run settings of an interrupted streamed Quest.json
+    
+    Returns:
+        tuple or None: (state, offset) where offset is where the next challenge
+        goes, or None if the file is complete or was not written by streaming
+    """
+    with open(quest_json_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 4096))  # The state block sits in the last few hundred bytes
+        tail = f.read()
+    
+    marker = _stream_state_marker()
+    pos = tail.rfind(marker)
+    if pos < 0:
+        return None
+    
+    state_line = tail[pos + len(marker):].split(b'\n', 1)[0].rstrip(b',')
+    try:
+        state = json.loads(state_line)
+    except json.JSONDecodeError:
+        return None
+    return state, size - len(tail) + pos
+
+def write_quests_stream(quest_json_path, challenges, task_library_output, state, offset=None):
+    """
+    Write challenges to Quest.json one at a time as they are produced
+    
+    After every challenge the file is closed off with the run state and an
+    empty taskLibrary, so an interrupted run leaves valid JSON that
+    read_stream_state can pick up again. The real taskLibrary is written last.
+    The finished file is identical to json.dump(quests, f, indent=2).
+    
+    Args:
+        quest_json_path (str): Output file
+        challenges (iterable): Challenges in output order
+        task_library_output (dict): The taskLibrary block
+        state (dict): Run settings; "written" counts the challenges in the file
+        offset (int): Resume at this offset of an interrupted file instead of starting over
+        
+    Returns:
+        int: Total number of challenges in the file
+    """
+    state = dict(state)
+    
+    with open(quest_json_path, 'wb' if offset is None else 'r+b') as f:
+        if offset is None:
+            f.write(b'{\n  "progressiveChallenges": [\n')
+            state["written"] = 0
+            offset = f.tell()
+        
+        for challenge in challenges:
+            with stage_timer("serialize"):
+                item = b'    ' + _indent_json(challenge, '    ')
+                if state["written"]:
+                    item = b',\n' + item
+                state["written"] += 1
+                
+                # Write the challenge and the closing state in one go over the old state
+                trailer = _stream_state_marker() + json.dumps(state).encode('utf8') + b',\n  "taskLibrary": {}\n}'
+                f.seek(offset)
+                f.write(item + trailer)
+                f.flush()
+                offset += len(item)
+            print(f"Generated: {challenge['title']}")
+        
+        with stage_timer("serialize"):
+            f.seek(offset)
+            f.write(b'\n  ],\n  "taskLibrary": ' + _indent_json(task_library_output, '  ') + b'\n}')
+            f.truncate()
+    
+    return state["written"]
+
+# Output formats and the file each one is written to
+#   pretty:  indented JSON, the format the app imports
+#   compact: minified JSON with titles, descriptions and weekly themes interned
+#   ndjson:  taskLibrary on the first line, then one challenge per line
+#   binary:  indexed store that is mmap'd and read in place, see QuestStore
+OUTPUT_FORMATS = {
+    "pretty": "Quest.json",
+    "compact": "Quest.min.json",
+    "ndjson": "Quest.ndjson",
+    "binary": "Quest.bin"
+}
+
+def format_for_path(path):
+    """
+    Return the output format of a quest file from its name
+    
+    Raises:
+        ValueError: If the name matches none of OUTPUT_FORMATS
+    """
+    matches = [(len(filename), output_format) for output_format, filename in OUTPUT_FORMATS.items()
+               if path.endswith(filename[len("Quest"):])]
+    if not matches:
+        raise ValueError(f"Cannot tell the format of {path}; use one of the extensions of "
+                         + ", ".join(OUTPUT_FORMATS.values()))
+    return max(matches)[1]
+
+def _variation_suffix(challenge_id):
+    """Return the title suffix " (n)" of a variation ID such as 1-2-3, or "" for a plain 1-2 ID"""
+    parts = challenge_id.split('-')
+    return f" ({parts[2]})" if len(parts) == 3 else ""
+
+def compact_quests(quests):
+    """
+    Convert quests to the compact layout
+    
+    Titles, descriptions and weekly themes are replaced by indexes into a shared
+    "strings" list. Variation titles are stored without their " (n)" suffix,
+    which expand_compact_quests rebuilds from the challenge ID.
+    """
+    strings = []
+    string_index = {}
+    
+    def intern(value):
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+    
+    challenges = []
+    for challenge in map(challenge_dict, quests["progressiveChallenges"]):
+        compact = dict(challenge)
+        suffix = _variation_suffix(challenge["id"])
+        if challenge["title"].endswith(suffix):
+            compact["title"] = intern(challenge["title"][:len(challenge["title"]) - len(suffix)])
+        compact["description"] = intern(challenge["description"])
+        compact["weeks"] = [dict(week, weeklyTrial=intern(week["weeklyTrial"])) for week in challenge["weeks"]]
+        challenges.append(compact)
+    
+    return {
+        "strings": strings,
+        "progressiveChallenges": challenges,
+        "taskLibrary": quests["taskLibrary"]
+    }
+
+def expand_compact_quests(compact):
+    """Convert the compact layout back to the regular quests structure"""
+    strings = compact["strings"]
+    challenges = []
+    for challenge in compact["progressiveChallenges"]:
+        expanded = dict(challenge)
+        if isinstance(challenge["title"], int):
+            expanded["title"] = strings[challenge["title"]] + _variation_suffix(challenge["id"])
+        expanded["description"] = strings[challenge["description"]]
+        expanded["weeks"] = [dict(week, weeklyTrial=strings[week["weeklyTrial"]]) for week in challenge["weeks"]]
+        challenges.append(expanded)
+    
+    return {
+        "progressiveChallenges": challenges,
+        "taskLibrary": compact["taskLibrary"]
+    }
+
+# Binary quest store (Quest.bin): layout of the header and of each record
+STORE_MAGIC = b"QSTB"
+STORE_VERSION = 1
+_STORE_HEADER = struct.Struct("<4sHHQQQQQQQQ")
+_STORE_CHALLENGE = struct.Struct("<IHIBIH")
+_STORE_WEEK = struct.Struct("<HIB")
+_STORE_DAY = struct.Struct("<HB")
+
+def _pack_array(typecode, values):
+    """Pack integers as a little-endian array"""
+    data = array.array(typecode, values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+def write_quest_store(f, challenges, task_library_output):
+    """
+    Write challenges to a binary quest store, one challenge at a time
+    
+    Layout, little-endian, with every offset counted from the start of the file:
+    - header: magic, version, task ID width, the challenge, string and task
+      counts, and the offsets of the sections below
+    - challenge records in order: the length-prefixed UTF-8 ID, then path,
+      intensity, title, description and weeks; weeks hold their days and days
+      hold their task IDs as numbers into the task table (2 bytes, or 4 when
+      the taskLibrary has 65536 entries or more)
+    - offset table: the u64 record offset of every challenge
+    - ID table: u32 challenge numbers sorted by ID, for binary search
+    - task table: the u32 string number of every task ID
+    - string table: u64 start offsets plus the end, then the UTF-8 data
+    - taskLibrary as compact JSON
+    
+    Paths, titles, descriptions, weekly themes and task IDs are interned in
+    the string table. Variation titles are stored without their " (n)" suffix,
+    which the reader rebuilds from the ID, and the workload totals are left out
+    and recomputed from the taskLibrary.
+    
+    Args:
+        f: Seekable binary file to write to
+        challenges (iterable): Challenges in output order
+        task_library_output (dict): The taskLibrary block
+        
+    Returns:
+        int: Number of challenges written
+        
+    Raises:
+        ValueError: If a value does not fit its field
+    """
+    strings = []
+    string_index = {}
+    
+    def intern(value):
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+    
+    # Number the library's task IDs up front so the width is known before the first record
+    task_strings = []
+    task_index = {}
+    
+    def intern_task(task_id):
+        if task_id not in task_index:
+            task_index[task_id] = len(task_strings)
+            task_strings.append(intern(task_id))
+        return task_index[task_id]
+    
+    for task_id in task_library_output:
+        intern_task(task_id)
+    task_width = 2 if len(task_strings) < 2**16 else 4
+    task_code = "H" if task_width == 2 else "I"
+    task_limit = 2**(8 * task_width)
+    
+    start = f.tell()
+    f.write(bytes(_STORE_HEADER.size))
+    position = _STORE_HEADER.size
+    offsets = []
+    ids = []
+    
+    for challenge in map(challenge_dict, challenges):
+        challenge_id = challenge["id"].encode('utf8')
+        if len(challenge_id) > 255:
+            raise ValueError(f"Challenge ID {challenge['id']} is too long for the quest store")
+        
+        suffix = _variation_suffix(challenge["id"])
+        title = challenge["title"]
+        has_suffix = bool(suffix) and title.endswith(suffix)
+        if has_suffix:
+            title = title[:len(title) - len(suffix)]
+        
+        record = [bytes([len(challenge_id)]), challenge_id,
+                  _STORE_CHALLENGE.pack(intern(challenge["path"]), challenge["intensity"], intern(title),
+                                        has_suffix, intern(challenge["description"]), len(challenge["weeks"]))]
+        for week in challenge["weeks"]:
+            record.append(_STORE_WEEK.pack(week["weekNumber"], intern(week["weeklyTrial"]), len(week["days"])))
+            for day in week["days"]:
+                tasks = [intern_task(task_id) for task_id in day["tasks"]]
+                if len(task_strings) > task_limit:
+                    raise ValueError(f"Too many distinct task IDs for the quest store: {len(task_strings)}")
+                record.append(_STORE_DAY.pack(day["dayNumber"], len(tasks)))
+                record.append(struct.pack(f"<{len(tasks)}{task_code}", *tasks))
+        
+        data = b"".join(record)
+        f.write(data)
+        offsets.append(position)
+        ids.append(challenge["id"])
+        position += len(data)
+    
+    # Tables after the records, then the header with their offsets
+    offsets_at = position
+    f.write(_pack_array("Q", offsets))
+    ids_at = offsets_at + 8 * len(offsets)
+    f.write(_pack_array("I", sorted(range(len(ids)), key=ids.__getitem__)))
+    tasks_at = ids_at + 4 * len(ids)
+    f.write(_pack_array("I", task_strings))
+    
+    encoded = [value.encode('utf8') for value in strings]
+    string_offsets = [0]
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+    strings_at = tasks_at + 4 * len(task_strings)
+    f.write(_pack_array("Q", string_offsets))
+    f.write(b"".join(encoded))
+    library_at = strings_at + 8 * len(string_offsets) + string_offsets[-1]
+    f.write(json.dumps(task_library_output, separators=(',', ':')).encode('utf8'))
+    
+    end = f.tell()
+    f.seek(start)
+    f.write(_STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, task_width, len(offsets), len(strings),
+                               len(task_strings), offsets_at, ids_at, tasks_at, strings_at, library_at))
+    f.seek(end)
+    return len(offsets)
+
+def serialize_quests(quests, output_format="pretty"):
+    """Serialize quests in one of OUTPUT_FORMATS and return the bytes"""
+    if output_format == "binary":
+        buffer = io.BytesIO()
+        write_quest_store(buffer, quests["progressiveChallenges"], quests["taskLibrary"])
+        return buffer.getvalue()
+    if output_format == "compact":
+        text = json.dumps(compact_quests(quests), separators=(',', ':'))
+    elif output_format == "ndjson":
+        lines = [json.dumps({"taskLibrary": quests["taskLibrary"]}, separators=(',', ':'))]
+        lines.extend(json.dumps(challenge, separators=(',', ':'), default=materialize_challenge)
+                     for challenge in quests["progressiveChallenges"])
+        text = "\n".join(lines) + "\n"
+    else:
+        text = json.dumps(quests, indent=2, default=materialize_challenge)
+    return text.encode('utf8')
+
+def parse_quests(data, output_format="pretty"):
+    """Parse bytes written by serialize_quests back into the regular quests structure"""
+    if output_format == "binary":
+        return QuestStore(data).to_quests()
+    if output_format == "compact":
+        return expand_compact_quests(json.loads(data))
+    if output_format == "ndjson":
+        lines = data.splitlines()
+        return {
+            "progressiveChallenges": [json.loads(line) for line in lines[1:]],
+            "taskLibrary": json.loads(lines[0])["taskLibrary"]
+        }
+    return json.loads(data)
+
+def report_output_formats(quests, repeat=5):
+    """Print the size and parse time of quests in every output format"""
+    print("\n" + "-" * 80)
+    print(f"{'Format':<10}{'File':<18}{'Size (bytes)':>14}{'vs pretty':>11}{'Parse (ms)':>12}")
+    print("-" * 80)
+    pretty_size = None
+    for output_format, filename in OUTPUT_FORMATS.items():
+        data = serialize_quests(quests, output_format)
+        if pretty_size is None:
+            pretty_size = len(data)
+        
+        # Best of a few runs to keep noise out of the comparison
+        parse_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse_quests(data, output_format)
+            parse_times.append(time.perf_counter() - start)
+        
+        print(f"{output_format:<10}{filename:<18}{len(data):>14,}{len(data) / pretty_size:>10.0%}"
+              f"{min(parse_times) * 1000:>12.2f}")
+    print("-" * 80)
+
+def _hash_json(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf8')).hexdigest()
+
+def manifest_path_for(output_path):
+    """Return the sidecar manifest path of an output file, e.g. Quest.manifest.json"""
+    return os.path.splitext(output_path)[0] + '.manifest.json'
+
+# Bumped whenever a seed starts producing different challenges, so incremental
+# runs regenerate the ones made by an older version
+GENERATION_VERSION = 3
+
+def build_manifest(task_library, num_variations, engine, seed):
+    """
+    Hash the inputs of every challenge group and taskLibrary entry
+    
+    A path-intensity group depends on the run settings, on which tasks are in
+    its pool and on their minutes and categories, which make up the workload
+    totals. So rewording a task changes one entry hash and no challenge hash.
+    """
+    manifest = {
+        "seed": seed,
+        "variations": num_variations,
+        "engine": engine,
+        "challenges": {},
+        "taskLibrary": {}
+    }
+    for path in PATHS:
+        for intensity in INTENSITIES:
+            pool = get_available_tasks(path, intensity, task_library)
+            workloads = [[parse_duration_minutes(task_library[task]["intensities"][str(intensity)]["duration"]),
+                          task_library[task]["category"]] for task in pool]
+            manifest["challenges"][f"{PATH_CODES[path]}-{intensity}"] = _hash_json(
+                [path, intensity, pool, workloads, num_variations, engine, seed, GENERATION_VERSION])
+    for task_id, entry in build_task_library_output(task_library).items():
+        manifest["taskLibrary"][task_id] = _hash_json(entry)
+    return manifest
+
+def describe_output(data):
+    """Return the size and SHA-256 of an output file's bytes, as recorded in the manifest"""
+    return {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data)}
+
+def load_manifest(manifest_path):
+    """Load a manifest written by a previous incremental run, or None"""
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf8') as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        print(f"Warning: ignoring unreadable manifest {manifest_path}: {e}")
+        return None
+
+def generate_incremental(task_library, manifest, previous, workers=1):
+    """
+    Regenerate only the challenges and taskLibrary entries whose inputs changed
+    
+    Args:
+        task_library (dict): Current task library
+        manifest (dict): Manifest of the current inputs, from build_manifest
+        previous (tuple): (manifest, QuestIndex) of the existing output, or None
+        workers (int): Number of processes generating challenges
+        
+    Returns:
+        dict: The quests, reusing unchanged parts of the previous output
+    """
+    old_manifest, old_index = previous or ({"challenges": {}, "taskLibrary": {}}, QuestIndex({}))
+    num_variations = manifest["variations"]
+    
+    # Groups whose inputs match the manifest are copied over as they are
+    reused = {}
+    for base_id, input_hash in manifest["challenges"].items():
+        old_challenges = old_index.by_base_id.get(base_id, [])
+        if old_manifest["challenges"].get(base_id) == input_hash and len(old_challenges) == num_variations:
+            reused[base_id] = old_challenges
+    
+    stale_jobs = [job for job in iter_variation_jobs(num_variations, manifest["engine"], manifest["seed"])
+                  if f"{PATH_CODES[job[0]]}-{job[1]}" not in reused]
+    generated = iter_challenges(stale_jobs, task_library, workers)
+    
+    quests = {"progressiveChallenges": [], "taskLibrary": {}}
+    for base_id in manifest["challenges"]:
+        if base_id in reused:
+            quests["progressiveChallenges"].extend(reused[base_id])
+        else:
+            for challenge in itertools.islice(generated, num_variations):
+                quests["progressiveChallenges"].append(challenge)
+                print(f"Generated: {challenge['title']}")
+    
+    changed_tasks = 0
+    for task_id, entry in build_task_library_output(task_library).items():
+        if (old_manifest["taskLibrary"].get(task_id) == manifest["taskLibrary"][task_id]
+                and task_id in old_index.task_library):
+            quests["taskLibrary"][task_id] = old_index.task_library[task_id]
+        else:
+            quests["taskLibrary"][task_id] = entry
+            changed_tasks += 1
+    
+    print(f"Reused {len(reused)} of {len(manifest['challenges'])} path-intensity groups, "
+          f"regenerated {len(stale_jobs)} challenges and {changed_tasks} taskLibrary entries")
+    return quests
+
+# Quest patches (Quest.patch.json): the changes between two generations
+PATCH_VERSION = 1
+
+def patch_path_for(output_path):
+    """Return the patch path of an output file, e.g. Quest.patch.json"""
+    return os.path.splitext(output_path)[0] + '.patch.json'
+
+def _diff_entries(old, new):
+    """
+    Diff two ordered (key, value) sequences
+    
+    Returns:
+        dict: removed keys, changed {key: value}, added [index, key, value] at
+        their index in new, and the full key order when kept keys moved
+    """
+    new_keys = [key for key, _ in new]
+    new_key_set = set(new_keys)
+    old_values = dict(old)
+    
+    delta = {
+        "removed": [key for key, _ in old if key not in new_key_set],
+        "changed": {},
+        "added": []
+    }
+    for index, (key, value) in enumerate(new):
+        if key not in old_values:
+            delta["added"].append([index, key, value])
+        elif old_values[key] != value:
+            delta["changed"][key] = value
+    
+    # Inserting the added entries by index rebuilds the order as long as the kept ones did not move
+    kept = [key for key, _ in old if key in new_key_set]
+    if kept != [key for key in new_keys if key in old_values]:
+        delta["order"] = new_keys
+    return delta
+
+def _apply_entries(old, delta):
+    """Apply a delta from _diff_entries to an ordered (key, value) sequence"""
+    removed = set(delta["removed"])
+    values = {key: value for key, value in old if key not in removed}
+    values.update(delta["changed"])
+    for _, key, value in delta["added"]:
+        values[key] = value
+    
+    if "order" in delta:
+        keys = delta["order"]
+    else:
+        keys = [key for key, _ in old if key not in removed]
+        for index, key, _ in delta["added"]:
+            keys.insert(index, key)
+    return [(key, values[key]) for key in keys]
+
+def diff_quests(old_quests, new_quests):
+    """
+    Build the patch that turns one generation of quests into the next
+    
+    Challenges are matched by ID and taskLibrary entries by key. The patch holds
+    the removed keys, the whole changed and added values, and where the added
+    ones go. The SHA-256 of both files in the pretty format lets
+    apply_quest_patch check that it starts from the right file and produces the
+    new one exactly.
+    
+    Args:
+        old_quests (dict): The previous quests
+        new_quests (dict): The new quests
+        
+    Returns:
+        dict: The patch
+    """
+    return {
+        "patchVersion": PATCH_VERSION,
+        "base": hashlib.sha256(serialize_quests(old_quests)).hexdigest(),
+        "target": hashlib.sha256(serialize_quests(new_quests)).hexdigest(),
+        "progressiveChallenges": _diff_entries(
+            [(challenge["id"], challenge) for challenge in map(challenge_dict, old_quests["progressiveChallenges"])],
+            [(challenge["id"], challenge) for challenge in map(challenge_dict, new_quests["progressiveChallenges"])]),
+        "taskLibrary": _diff_entries(list(old_quests["taskLibrary"].items()),
+                                     list(new_quests["taskLibrary"].items()))
+    }
+
+def apply_quest_patch(old_quests, patch, verify=True):
+    """
+    Apply a patch from diff_quests to the quests it was made against
+    
+    Args:
+        old_quests (dict): The previous quests
+        patch (dict): The patch
+        verify (bool): Check the base and result against the hashes in the patch
+        
+    Returns:
+        dict: The new quests
+        
+    Raises:
+        ValueError: If the patch is of another version, or verify is set and the
+            quests are not the patch's base or the result does not match its target
+    """
+    if patch.get("patchVersion") != PATCH_VERSION:
+        raise ValueError(f"quest patch version {patch.get('patchVersion')} is not supported "
+                         f"(expected {PATCH_VERSION})")
+    if verify and hashlib.sha256(serialize_quests(old_quests)).hexdigest() != patch["base"]:
+        raise ValueError("the quests are not the ones this patch was made against")
+    
+    challenges = _apply_entries([(challenge["id"], challenge)
+                                 for challenge in map(challenge_dict, old_quests["progressiveChallenges"])],
+                                patch["progressiveChallenges"])
+    quests = {
+        "progressiveChallenges": [challenge for _, challenge in challenges],
+        "taskLibrary": dict(_apply_entries(list(old_quests["taskLibrary"].items()), patch["taskLibrary"]))
+    }
+    
+    if verify and hashlib.sha256(serialize_quests(quests)).hexdigest() != patch["target"]:
+        raise ValueError("applying the patch did not reproduce the new quests")
+    return quests
+
+def load_quests(path):
+    """Load a whole quest file of any of OUTPUT_FORMATS, picked from its name"""
+    with open(path, 'rb') as f:
+        return parse_quests(f.read(), format_for_path(path))
+
+def write_quest_patch(old_quests, new_quests, patch_path):
+    """
+    Write the patch between two generations and check that it round-trips
+    
+    Returns:
+        dict: The patch
+        
+    Raises:
+        ValueError: If applying the patch does not give new_quests back
+    """
+    patch = diff_quests(old_quests, new_quests)
+    # Round trip through the written bytes, as a client would receive them
+    data = json.dumps(patch, separators=(',', ':')).encode('utf8')
+    if serialize_quests(apply_quest_patch(old_quests, json.loads(data))) != serialize_quests(new_quests):
+        raise ValueError("the quest patch does not reproduce the new quests")
+    written = write_if_changed(patch_path, data)
+    
+    delta = patch["progressiveChallenges"]
+    tasks = patch["taskLibrary"]
+    print(f"Patch: {len(delta['added'])} added, {len(delta['changed'])} changed and {len(delta['removed'])} removed "
+          f"challenges; {len(tasks['added']) + len(tasks['changed']) + len(tasks['removed'])} taskLibrary entries")
+    print(f"Patch: {len(data)} bytes, {len(data) / max(1, len(serialize_quests(new_quests))):.1%} of the full file")
+    report_write(patch_path, written)
+    return patch
+
+# Sharded output: one file per path and intensity, listed in a manifest
+SHARD_DIR_NAME = "QuestShards"
+SHARD_MANIFEST_NAME = "manifest.json"
+
+def shard_filename(base_id, output_format="pretty"):
+    """Return the file name of a shard, e.g. Quest.2-3.json"""
+    return f"Quest.{base_id}" + OUTPUT_FORMATS[output_format][len("Quest"):]
+
+def write_quest_shards(challenges, task_library_output, shard_dir, output_format="pretty", settings=None):
+    """
+    Write challenges as one quest file per path and intensity
+    
+    Each shard has the regular quests structure with one group's challenges
+    and only the taskLibrary entries they use, so a client loads just the
+    combination it follows. Challenges must come grouped by base ID, as
+    generation yields them; each shard is written as soon as its group ends.
+    Shards go through write_if_changed, and shards of an earlier run that are
+    no longer listed are removed.
+    
+    Args:
+        challenges (iterable): Challenges in Quest.json order
+        task_library_output (dict): The full taskLibrary block
+        shard_dir (str): Directory for the shards and manifest.json
+        output_format (str): One of OUTPUT_FORMATS, used for every shard
+        settings (dict): Run settings recorded in the manifest
+        
+    Returns:
+        dict: The manifest, with the file, counts, size and SHA-256 of every shard
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest_path = os.path.join(shard_dir, SHARD_MANIFEST_NAME)
+    old_manifest = load_manifest(manifest_path) or {}
+    
+    manifest = dict(settings or {}, format=output_format, shards={})
+    written = 0
+    for base_id, group in itertools.groupby(challenges, key=lambda challenge: base_challenge_id(challenge["id"])):
+        group = list(group)
+        if base_id in manifest["shards"]:
+            raise ValueError(f"Challenges of {base_id} are not grouped together")
+        
+        used = {task_id for challenge in group for week in challenge["weeks"]
+                for day in week["days"] for task_id in day["tasks"]}
+        missing = used.difference(task_library_output)
+        if missing:
+            raise ValueError(f"Shard {base_id} uses tasks missing from taskLibrary: {', '.join(sorted(missing))}")
+        quests = {
+            "progressiveChallenges": group,
+            "taskLibrary": {task_id: entry for task_id, entry in task_library_output.items() if task_id in used}
+        }
+        
+        data = serialize_quests(quests, output_format)
+        filename = shard_filename(base_id, output_format)
+        written += write_if_changed(os.path.join(shard_dir, filename), data)
+        manifest["shards"][base_id] = {
+            "file": filename,
+            "path": group[0]["path"],
+            "intensity": group[0]["intensity"],
+            "challenges": len(group),
+            "tasks": len(quests["taskLibrary"]),
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest()
+        }
+    
+    # Drop shards the previous run wrote that this one did not, e.g. after a format change
+    current = {shard["file"] for shard in manifest["shards"].values()}
+    for shard in old_manifest.get("shards", {}).values():
+        stale_path = os.path.join(shard_dir, shard.get("file", ""))
+        if shard.get("file") and shard["file"] not in current and os.path.isfile(stale_path):
+            os.remove(stale_path)
+    
+    write_if_changed(manifest_path, json.dumps(manifest, indent=2).encode('utf8'))
+    print(f"Wrote {written} of {len(manifest['shards'])} shards, the rest were unchanged")
+    return manifest
+
+def generate_quest_json(num_variations=1, engine="sampler", seed=None, workers=1,
+                        stream=False, resume=False, output_format="pretty", report_formats=False,
+                        incremental=False, library_path='assets/TaskLibrary.json', output_dir=None,
+                        diff_against=None, shard=False):
+    """
+    Generate a complete Quest.json file with challenges at different intensity levels
+    
+    Args:
+        num_variations (int): Number of variations for each path-intensity combination
+        engine (str): Engine that picks the daily task pairs, one of ENGINES
+        seed (int): Run seed; the same seed always gives the same file. Random if None
+        workers (int): Number of processes generating challenges (0 uses every core)
+        stream (bool): Write each challenge as soon as it is generated instead of
+            building the whole document in memory
+        resume (bool): Continue an interrupted streamed run (implies stream)
+        output_format (str): One of OUTPUT_FORMATS; streaming only writes "pretty"
+        report_formats (bool): Print the size and parse time of every output format
+        incremental (bool): Keep a manifest of input hashes next to the output and only
+            regenerate what changed since the last incremental run
+        library_path (str): Task library to generate from
+        output_dir (str): Directory to write to instead of the assets folder
+        diff_against (str): Previous quest file to write a patch against, next to the output
+        shard (bool): Write one file per path and intensity to QuestShards/ instead,
+            see write_quest_shards
+        
+    Returns:
+        dict or None: The quests, or None when streaming or sharding since they are
+        never held in memory
+    """
+    # Load the task library
+    with stage_timer("load"):
+        task_library = load_task_library(library_path=library_path)
+    
+    quest_json_path = os.path.join(output_dir or os.path.dirname(os.path.abspath(__file__)), 'Quest.json')
+    
+    output_path = os.path.join(os.path.dirname(quest_json_path), OUTPUT_FORMATS[output_format])
+    
+    if stream and output_format not in ("pretty", "binary"):
+        raise ValueError(f"Streaming only writes the pretty and binary formats, not {output_format}")
+    if resume and output_format != "pretty":
+        raise ValueError(f"Only streamed pretty files can be resumed, not {output_format}")
+    if incremental and (stream or resume):
+        raise ValueError("Incremental regeneration cannot be combined with streaming")
+    if diff_against and (stream or resume):
+        raise ValueError("A patch cannot be written while streaming")
+    if shard and (stream or resume or incremental or diff_against):
+        raise ValueError("Sharded output cannot be combined with streaming, incremental runs or patches")
+    
+    # Read the old quests first, as they may be the file about to be overwritten
+    old_quests = load_quests(diff_against) if diff_against else None
+    
+    previous = None
+    if incremental:
+        old_manifest = load_manifest(manifest_path_for(output_path))
+        if old_manifest and os.path.exists(output_path):
+            with open(output_path, 'rb') as f:
+                data = f.read()
+            # The output may have been rewritten since, e.g. by a run without --incremental
+            if old_manifest.get("output") == describe_output(data):
+                previous = (old_manifest, QuestIndex(parse_quests(data, output_format)))
+                if seed is None:
+                    seed = old_manifest["seed"]  # Keep unchanged challenges identical
+            else:
+                print(f"Warning: {output_path} does not match its manifest, regenerating everything")
+    
+    offset = None
+    skip = 0
+    if resume:
+        stream = True
+        stream_state = read_stream_state(quest_json_path) if os.path.exists(quest_json_path) else None
+        if stream_state is None:
+            raise ValueError(f"Nothing to resume: {quest_json_path} is not an interrupted streamed Quest.json")
+        state, offset = stream_state
+        seed, num_variations, engine, skip = state["seed"], state["variations"], state["engine"], state["written"]
+        print(f"Resuming after {skip} challenges with seed {seed}, "
+              f"{num_variations} variations and the {engine} engine")
+    else:
+        if seed is None:
+            seed = random.randrange(2**32)
+        print(f"Using seed {seed}")
+    if engine == "numpy":
+        require_numpy()
+    
+    # Generate challenges for each path and intensity combination
+    jobs = itertools.islice(iter_variation_jobs(num_variations, engine, seed), skip, None)
+    challenges = iter_challenges(jobs, task_library, workers)
+    
+    def announce(challenges):
+        for challenge in challenges:
+            yield challenge
+            print(f"Generated: {challenge['title']}")
+    
+    if shard:
+        # Shards are written group by group, so only one group is held in memory
+        shard_dir = os.path.join(os.path.dirname(quest_json_path), SHARD_DIR_NAME)
+        settings = {"seed": seed, "variations": num_variations, "engine": engine}
+        with stage_timer("serialize"):
+            manifest = write_quest_shards(announce(challenges), build_task_library_output(task_library),
+                                          shard_dir, output_format, settings)
+        total = sum(entry["challenges"] for entry in manifest["shards"].values())
+        print(f"Successfully generated {len(manifest['shards'])} shards with {total} challenges")
+        print(f"Shards saved to: {shard_dir}")
+        return None
+    
+    if stream and output_format == "binary":
+        writer = AtomicWriter(output_path)
+        with stage_timer("serialize"), writer as f:
+            total = write_quest_store(f, announce(challenges), build_task_library_output(task_library))
+        print(f"Successfully generated {OUTPUT_FORMATS[output_format]} with {total} challenges")
+        report_write(output_path, writer.written)
+        return None
+    
+    if stream:
+        state = {"seed": seed, "variations": num_variations, "engine": engine, "written": skip}
+        total = write_quests_stream(quest_json_path, challenges,
+                                    build_task_library_output(task_library), state, offset)
+        print(f"Successfully generated Quest.json with {total} challenges")
+        print(f"File saved to: {quest_json_path}")
+        return None
+    
+    if incremental:
+        manifest = build_manifest(task_library, num_variations, engine, seed)
+        quests = generate_incremental(task_library, manifest, previous, workers)
+    else:
+        # Create quests structure
+        quests = {
+            "progressiveChallenges": [],
+            "taskLibrary": build_task_library_output(task_library)
+        }
+        
+        # Challenges are held compacted and only rebuilt as dicts while serializing
+        table = TaskTable(quests["taskLibrary"])
+        for challenge in challenges:
+            quests["progressiveChallenges"].append(compact_challenge(challenge, table))
+            print(f"Generated: {challenge['title']}")
+    
+    # Write to Quest.json, or the file of the chosen format, only if it changed
+    with stage_timer("serialize"):
+        data = serialize_quests(quests, output_format)
+        written = write_if_changed(output_path, data)
+    
+    if incremental:
+        manifest["output"] = describe_output(data)
+        write_if_changed(manifest_path_for(output_path), json.dumps(manifest, indent=2).encode('utf8'))
+    
+    print(f"Successfully generated {OUTPUT_FORMATS[output_format]} with {len(quests['progressiveChallenges'])} challenges")
+    report_write(output_path, written)
+    
+    if old_quests is not None:
+        write_quest_patch(old_quests, quests, patch_path_for(output_path))
+    
+    if report_formats:
+        report_output_formats(quests)
+
+    return quests
+
+def base_challenge_id(challenge_id):
+    """Return the path-intensity part ("X-Y") of a challenge ID such as 1-2 or 1-2-3"""
+    return '-'.join(challenge_id.split('-')[:2])
+
+class TaskLookup:
+    """Task detail lookups shared by QuestIndex and QuestStore, cached per task ID"""
+    
+    def task_details(self, task_id):
+        """
+        Resolve a task ID such as "meditation-2" against taskLibrary
+        
+        Returns:
+            dict or None: The id, task, duration and category of the task
+        """
+        if task_id not in self._task_details:
+            task_info = self.task_library.get(task_id)
+            self._task_details[task_id] = dict(task_info, id=task_id) if task_info else None
+        return self._task_details[task_id]
+    
+    def task_label(self, task_id):
+        """Return "Task (duration)" for display, or the bare ID if it is not in taskLibrary"""
+        details = self.task_details(task_id)
+        return f"{details['task']} ({details['duration']})" if details else task_id
+
+class QuestIndex(TaskLookup):
+    """
+    Lookup tables over a loaded quests structure, built once
+    
+    Challenges are indexed by full ID ("1-2-3"), by base ID ("1-2"), by path
+    and by intensity, so every query is a dictionary access plus the matches.
+    Task details are resolved from taskLibrary once and cached.
+    
+    Args:
+        quests (dict): Quests with "progressiveChallenges" and "taskLibrary"
+    """
+    
+    def __init__(self, quests):
+        self.quests = quests
+        self.challenges = quests.get('progressiveChallenges', [])
+        self.task_library = quests.get('taskLibrary', {})
+        
+        self.by_id = {}
+        self.by_base_id = {}
+        self.by_path = {}
+        self.by_intensity = {}
+        for challenge in self.challenges:
+            self.by_id[challenge['id']] = challenge
+            self.by_base_id.setdefault(base_challenge_id(challenge['id']), []).append(challenge)
+            self.by_path.setdefault(challenge['path'], []).append(challenge)
+            self.by_intensity.setdefault(challenge['intensity'], []).append(challenge)
+        
+        self._task_details = {}
+    
+    def close(self):
+        pass  # Nothing is held open; matches QuestStore and LazyQuestIndex
+    
+    def __len__(self):
+        return len(self.challenges)
+    
+    def __iter__(self):
+        return iter(self.challenges)
+    
+    def base_ids(self):
+        """Return the base IDs ("X-Y") in sorted order"""
+        return sorted(self.by_base_id)
+    
+    def count(self, base_id):
+        """Return the number of variations of a base ID"""
+        return len(self.by_base_id.get(base_id, []))
+    
+    def get(self, challenge_id):
+        """Return the challenge with exactly this ID, or None"""
+        return self.by_id.get(challenge_id)
+    
+    def find(self, path_code):
+        """
+        Return the challenges matching a user-entered code
+        
+        Args:
+            path_code (str): "12" or "1-2" for every variation of a path and
+                intensity, or a full variation ID such as "1-2-3"
+                
+        Returns:
+            list: Matching challenges, empty if there are none
+        """
+        normalized = normalize_path_code(path_code)
+        if normalized in self.by_base_id:
+            return self.by_base_id[normalized]
+        challenge = self.by_id.get(normalized)
+        return [challenge] if challenge else []
+    
+    def for_path(self, path):
+        """Return the challenges of a path name such as mental"""
+        return self.by_path.get(path, [])
+    
+    def for_intensity(self, intensity):
+        """Return the challenges of an intensity level"""
+        return self.by_intensity.get(int(intensity), [])
+
+
+class QuestStore(TaskLookup):
+    """
+    Read challenges from a binary quest store without loading it
+    
+    Opening a store only reads its header. Every lookup reads the offset and
+    ID tables in place and decodes just the challenges it returns, so with an
+    mmap the file is paged in on demand. See write_quest_store for the layout.
+    
+    Args:
+        buffer: The store's bytes, or an mmap of a Quest.bin file
+        
+    Raises:
+        ValueError: If the buffer does not hold a quest store
+    """
+    
+    def __init__(self, buffer):
+        if len(buffer) < _STORE_HEADER.size:
+            raise ValueError("file is too short to be a quest store")
+        (magic, version, task_width, self.num_challenges, self.num_strings, self.num_tasks,
+         self._offsets_at, self._ids_at, self._tasks_at, self._strings_at,
+         self._library_at) = _STORE_HEADER.unpack_from(buffer)
+        if magic != STORE_MAGIC:
+            raise ValueError("not a quest store")
+        if version != STORE_VERSION:
+            raise ValueError(f"quest store version {version} is not supported (expected {STORE_VERSION})")
+        
+        self.buffer = buffer
+        self._task_code = "H" if task_width == 2 else "I"
+        self._task_width = task_width
+        self._string_data_at = self._strings_at + 8 * (self.num_strings + 1)
+        self._strings = {}
+        self._task_ids = None
+        self._task_library = None
+        self._base_ids = None
+        self._task_details = {}
+        self._task_workloads = {}
+    
+    def close(self):
+        """Release the mmap, if the store was opened from a file"""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+    
+    def __len__(self):
+        return self.num_challenges
+    
+    def __iter__(self):
+        for number in range(self.num_challenges):
+            yield self.challenge_at(number)
+    
+    @property
+    def task_library(self):
+        """The taskLibrary block, decoded on first use"""
+        if self._task_library is None:
+            self._task_library = json.loads(bytes(self.buffer[self._library_at:]))
+        return self._task_library
+    
+    def _string(self, number):
+        if number not in self._strings:
+            start, end = struct.unpack_from("<QQ", self.buffer, self._strings_at + 8 * number)
+            data_at = self._string_data_at
+            self._strings[number] = bytes(self.buffer[data_at + start:data_at + end]).decode('utf8')
+        return self._strings[number]
+    
+    def _task_id(self, number):
+        if self._task_ids is None:
+            string_numbers = struct.unpack_from(f"<{self.num_tasks}I", self.buffer, self._tasks_at)
+            self._task_ids = [self._string(string_number) for string_number in string_numbers]
+        return self._task_ids[number]
+    
+    def _task_workload(self, number):
+        """Return the (minutes, category) of a task number, from the taskLibrary"""
+        if number not in self._task_workloads:
+            details = self.task_details(self._task_id(number)) or {}
+            self._task_workloads[number] = (details.get("durationMinutes"), details.get("category"))
+        return self._task_workloads[number]
+    
+    def _record_at(self, number):
+        return struct.unpack_from("<Q", self.buffer, self._offsets_at + 8 * number)[0]
+    
+    def id_at(self, number):
+        """Return the ID of the challenge at a position in file order"""
+        offset = self._record_at(number)
+        return bytes(self.buffer[offset + 1:offset + 1 + self.buffer[offset]]).decode('utf8')
+    
+    def _sorted_at(self, rank):
+        """Return the position of the challenge with the rank-th smallest ID"""
+        return struct.unpack_from("<I", self.buffer, self._ids_at + 4 * rank)[0]
+    
+    def _lower_bound(self, challenge_id):
+        """Return the rank of the first ID not below challenge_id"""
+        low, high = 0, self.num_challenges
+        while low < high:
+            middle = (low + high) // 2
+            if self.id_at(self._sorted_at(middle)) < challenge_id:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def challenge_at(self, number):
+        """Decode the challenge at a position in file order"""
+        buffer = self.buffer
+        offset = self._record_at(number)
+        id_length = buffer[offset]
+        challenge_id = bytes(buffer[offset + 1:offset + 1 + id_length]).decode('utf8')
+        offset += 1 + id_length
+        
+        path, intensity, title, has_suffix, description, num_weeks = _STORE_CHALLENGE.unpack_from(buffer, offset)
+        offset += _STORE_CHALLENGE.size
+        
+        weeks = []
+        for _ in range(num_weeks):
+            week_number, trial, num_days = _STORE_WEEK.unpack_from(buffer, offset)
+            offset += _STORE_WEEK.size
+            days = []
+            for _ in range(num_days):
+                day_number, num_tasks = _STORE_DAY.unpack_from(buffer, offset)
+                offset += _STORE_DAY.size
+                tasks = struct.unpack_from(f"<{num_tasks}{self._task_code}", buffer, offset)
+                offset += num_tasks * self._task_width
+                days.append({"dayNumber": day_number, "tasks": [self._task_id(task) for task in tasks],
+                             **summarize_workload(self._task_workload(task) for task in tasks)})
+            weeks.append({"weekNumber": week_number, "weeklyTrial": self._string(trial),
+                          **summarize_workload(days), "days": days})
+        
+        title = self._string(title)
+        if has_suffix:
+            title += _variation_suffix(challenge_id)
+        return {
+            "id": challenge_id,
+            "path": self._string(path),
+            "intensity": intensity,
+            "title": title,
+            "description": self._string(description),
+            **summarize_workload(weeks),
+            "weeks": weeks
+        }
+    
+    def get(self, challenge_id):
+        """Return the challenge with exactly this ID, or None"""
+        number = self._position(challenge_id)
+        return None if number is None else self.challenge_at(number)
+    
+    def _base_ranks(self, base_id):
+        """Return the ID-table ranks of the variation IDs ("X-Y-n") of a base ID"""
+        return range(self._lower_bound(base_id + '-'), self._lower_bound(base_id + '-\U0010ffff'))
+    
+    def _position(self, challenge_id):
+        """Return the file position of the challenge with exactly this ID, or None"""
+        rank = self._lower_bound(challenge_id)
+        if rank < self.num_challenges:
+            number = self._sorted_at(rank)
+            if self.id_at(number) == challenge_id:
+                return number
+        return None
+    
+    def _base_positions(self, base_id):
+        """Return the file positions of every challenge of a base ID, in file order"""
+        # Only a full "X-Y" is a base ID; "1" must not match every ID starting with "1-"
+        if base_id.count('-') != 1:
+            return []
+        positions = [self._sorted_at(rank) for rank in self._base_ranks(base_id)]
+        number = self._position(base_id)
+        if number is not None:
+            positions.append(number)
+        return sorted(positions)
+    
+    def base_ids(self):
+        """Return the base IDs ("X-Y") in sorted order, skipping over the variations of each"""
+        if self._base_ids is None:
+            base_ids = set()
+            rank = 0
+            while rank < self.num_challenges:
+                challenge_id = self.id_at(self._sorted_at(rank))
+                base_id = base_challenge_id(challenge_id)
+                base_ids.add(base_id)
+                rank = self._base_ranks(base_id).stop if challenge_id != base_id else rank + 1
+            self._base_ids = sorted(base_ids)
+        return self._base_ids
+    
+    def count(self, base_id):
+        """Return the number of challenges of a base ID"""
+        return len(self._base_positions(base_id))
+    
+    def find(self, path_code):
+        """Return the challenges matching a user-entered code, like QuestIndex.find"""
+        normalized = normalize_path_code(path_code)
+        positions = self._base_positions(normalized)
+        if positions:
+            return [self.challenge_at(number) for number in positions]
+        challenge = self.get(normalized)
+        return [challenge] if challenge else []
+    
+    def to_quests(self):
+        """Decode the whole store into the regular quests structure"""
+        return {
+            "progressiveChallenges": list(self),
+            "taskLibrary": self.task_library
+        }
+
+def open_quest_store(path):
+    """Open a Quest.bin file as a QuestStore backed by an mmap of the file"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return QuestStore(buffer)
+
+def convert_quests(source_path, destination_path):
+    """
+    Convert a quest file between OUTPUT_FORMATS, picked from the file names
+    
+    A store copied to another store goes one challenge at a time, so it is
+    never decoded into memory as a whole.
+    """
+    source_format = format_for_path(source_path)
+    destination_format = format_for_path(destination_path)
+    
+    if source_format == "binary":
+        store = open_quest_store(source_path)
+        if destination_format == "binary":
+            challenges, task_library_output = iter(store), store.task_library
+        else:
+            quests = store.to_quests()
+    else:
+        with open(source_path, 'rb') as f:
+            quests = parse_quests(f.read(), source_format)
+        challenges, task_library_output = quests["progressiveChallenges"], quests["taskLibrary"]
+    
+    writer = AtomicWriter(destination_path)
+    with writer as f:
+        if destination_format == "binary":
+            total = write_quest_store(f, challenges, task_library_output)
+        else:
+            f.write(serialize_quests(quests, destination_format))
+            total = len(quests["progressiveChallenges"])
+    
+    if source_format == "binary":
+        store.close()
+    print(f"Converted {total} challenges from {source_path} to {destination_path}")
+    report_write(destination_path, writer.written)
+
+# Next non-whitespace character of a JSON text, and the decoder used for single values
+_JSON_NON_WHITESPACE = re.compile(r'[^ \t\n\r]')
+_JSON_DECODER = json.JSONDecoder()
+
+class _JsonScanner:
+    """
+    Read a JSON file one value at a time, keeping track of byte offsets
+    
+    Only a window of the file is held in memory. A value that runs past the
+    window is decoded again once more of the file has been read.
+    """
+    
+    def __init__(self, f, chunk_size=1 << 20):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder('utf8')()
+        self._text = ""
+        self._pos = 0
+        self._base = 0  # Byte offset of self._text[0]
+        self._ascii = True
+        self._eof = False
+    
+    def _fill(self):
+        """Drop the consumed text and read another chunk"""
+        data = self._file.read(self._chunk_size)
+        consumed = self._text[:self._pos]
+        self._base += len(consumed) if self._ascii else len(consumed.encode('utf8'))
+        self._text = self._text[self._pos:] + self._decoder.decode(data, final=not data)
+        self._pos = 0
+        self._ascii = self._text.isascii()
+        self._eof = not data
+    
+    def _offset(self, pos):
+        """Return the byte offset of a position in the window"""
+        return self._base + (pos if self._ascii else len(self._text[:pos].encode('utf8')))
+    
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, or "" at the end"""
+        while True:
+            match = _JSON_NON_WHITESPACE.search(self._text, self._pos)
+            if match:
+                self._pos = match.start()
+                return self._text[self._pos]
+            self._pos = len(self._text)
+            if self._eof:
+                return ""
+            self._fill()
+    
+    def expect(self, chars):
+        """Consume the next character, which must be one of chars, and return it"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at byte {self._offset(self._pos)}")
+        self._pos += 1
+        return char
+    
+    def value(self):
+        """Decode the next value; returns it with its start and end byte offsets"""
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self._text, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # A number may go on in the next chunk, so the value only counts
+                # once the character after it shows where it ends
+                if self._eof or (end < len(self._text) and self._text[end] in ' \t\n\r,:]}'):
+                    start = self._offset(self._pos)
+                    self._pos = end
+                    return value, start, self._offset(end)
+            self._fill()
+
+def scan_quest_file(f, chunk_size=1 << 20):
+    """
+    Walk a Quest.json file one challenge and one taskLibrary entry at a time
+    
+    Args:
+        f: Quest.json opened in binary mode
+        chunk_size (int): Number of bytes read at a time
+        
+    Yields:
+        tuple: ("challenge", challenge, start, end) for every element of
+            progressiveChallenges and ("task", (task_id, entry), start, end) for
+            every taskLibrary entry, with the byte range of the challenge or entry.
+            Other top-level entries are skipped.
+            
+    Raises:
+        ValueError: If the file is not a JSON object (json.JSONDecodeError included)
+    """
+    scanner = _JsonScanner(f, chunk_size)
+    
+    def members(close):
+        """Yield the keys of an object, or None per array element, leaving each value to the caller"""
+        if scanner.peek() == close:
+            scanner.expect(close)
+            return
+        while True:
+            key = None
+            if close == '}':
+                key = scanner.value()[0]
+                if not isinstance(key, str):
+                    raise ValueError(f"Expected an object key, got {key!r}")
+                scanner.expect(':')
+            yield key
+            if scanner.expect(',' + close) == close:
+                return
+    
+    scanner.expect('{')
+    for key in members('}'):
+        if key == "progressiveChallenges" and scanner.peek() == '[':
+            scanner.expect('[')
+            for _ in members(']'):
+                yield ("challenge",) + scanner.value()
+        elif key == "taskLibrary" and scanner.peek() == '{':
+            scanner.expect('{')
+            for task_id in members('}'):
+                entry, start, end = scanner.value()
+                yield "task", (task_id, entry), start, end
+        else:
+            scanner.value()
+
+class _LazyTaskLibrary(Mapping):
+    """taskLibrary entries of a quest file, each decoded from its byte range on first access"""
+    
+    def __init__(self, read, spans):
+        self._read = read
+        self._spans = spans
+        self._entries = {}
+    
+    def __getitem__(self, task_id):
+        if task_id not in self._entries:
+            self._entries[task_id] = self._read(*self._spans[task_id])
+        return self._entries[task_id]
+    
+    def __iter__(self):
+        return iter(self._spans)
+    
+    def __len__(self):
+        return len(self._spans)
+
+class LazyQuestIndex(TaskLookup):
+    """
+    Index a Quest.json file by byte offsets instead of loading it
+    
+    One pass with scan_quest_file records where every challenge and every
+    taskLibrary entry starts and ends; the decoded values are dropped as the
+    pass goes. Lookups then seek to the challenges they return and decode
+    only those, and task details decode only the entries they need, so memory
+    stays bounded by the index rather than the file.
+    
+    Args:
+        quest_json_path (str): Quest.json to index
+        chunk_size (int): Number of bytes read at a time during the pass
+        
+    Raises:
+        ValueError: If the file is not a valid Quest.json
+        KeyError: If a challenge has no ID
+    """
+    
+    def __init__(self, quest_json_path, chunk_size=1 << 20):
+        self.path = quest_json_path
+        self._file = open(quest_json_path, 'rb')
+        self.ids = []
+        self._starts = array.array('Q')
+        self._ends = array.array('Q')
+        self._positions = {}
+        self.by_base_id = {}
+        task_spans = {}
+        
+        try:
+            for kind, value, start, end in scan_quest_file(self._file, chunk_size):
+                if kind == "challenge":
+                    position = len(self.ids)
+                    self.ids.append(value['id'])
+                    self._starts.append(start)
+                    self._ends.append(end)
+                    self._positions[value['id']] = position
+                    self.by_base_id.setdefault(base_challenge_id(value['id']), []).append(position)
+                else:
+                    task_spans[value[0]] = (start, end)
+        except (ValueError, KeyError):
+            self._file.close()
+            raise
+        
+        self.task_library = _LazyTaskLibrary(self._read, task_spans)
+        self._task_details = {}
+    
+    def close(self):
+        self._file.close()
+    
+    def _read(self, start, end):
+        """Decode the value stored at a byte range of the file"""
+        self._file.seek(start)
+        return json.loads(self._file.read(end - start))
+    
+    def challenge_at(self, position):
+        """Decode the challenge at a position in file order"""
+        return self._read(self._starts[position], self._ends[position])
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __iter__(self):
+        for position in range(len(self.ids)):
+            yield self.challenge_at(position)
+    
+    def base_ids(self):
+        """Return the base IDs ("X-Y") in sorted order"""
+        return sorted(self.by_base_id)
+    
+    def count(self, base_id):
+        """Return the number of variations of a base ID"""
+        return len(self.by_base_id.get(base_id, []))
+    
+    def get(self, challenge_id):
+        """Return the challenge with exactly this ID, or None"""
+        position = self._positions.get(challenge_id)
+        return None if position is None else self.challenge_at(position)
+    
+    def find(self, path_code):
+        """Return the challenges matching a user-entered code, like QuestIndex.find"""
+        normalized = normalize_path_code(path_code)
+        if normalized in self.by_base_id:
+            return [self.challenge_at(position) for position in self.by_base_id[normalized]]
+        challenge = self.get(normalized)
+        return [challenge] if challenge else []
 
-def generate_weekly_plan(path, intensity, week_number, task_library):
-    """Generate a 7-day plan with appropriate tasks for the path and intensity"""
-    # Define appropriate tasks for each path
-    path_tasks = {
-        "mental": ["meditation", "journaling", "book-reading", "podcast", "chill-music", 
-                  "self-reflection", "creative-training", "article-reading", "skill-dev",
-                  "documentary", "cooking", "social-talk", "hobby-discovery"],
-        "physical": ["walking", "bodyweight", "stretching", "yoga", "jogging", 
-                    "rhythmic-movement", "recovery", "good-sleep", "outdoor-cardio",
-                    "gym-workout", "running"],
-        "balanced": ["meditation", "walking", "journaling", "bodyweight", "book-reading",
-                    "yoga", "stretching", "creative-training", "recovery", "podcast",
-                    "self-reflection", "jogging", "article-reading", "skill-dev"]
-    }
+_CHALLENGE_ID = re.compile(r"(\d+)-(\d+)(?:-(\d+))?")
+
+class QuestValidator:
+    """
+    Check quests one challenge and one taskLibrary entry at a time
     
-    # Define weekly themes based on week number
-    weekly_themes = {
-        "mental": {
-            1: "Foundation in mindfulness with meditation and journaling",
-            2: "Expanding learning with reading and skill development",
-            3: "Creative expression and social connection", 
-            4: "Integrating all mental practices into a sustainable routine"
-        },
-        "physical": {
-            1: "Building a foundation of basic movements",
-            2: "Increasing endurance with longer activities",
-            3: "Adding variety to your physical routine",
-            4: "Creating a balanced and sustainable exercise plan"
-        },
-        "balanced": {
-            1: "Establishing basic mental and physical practices",
-            2: "Balancing mind and body with consistent practice",
-            3: "Integrating wellness into daily life",
-            4: "Creating a sustainable holistic routine"
-        }
-    }
+    Every challenge is checked on its own as it arrives, so a validation pass
+    is linear in the file size. Across challenges only the seen IDs and the
+    distinct task IDs are kept, the latter to resolve against taskLibrary at
+    the end since a streamed Quest.json writes it last. Violations are counted
+    by kind, and the first max_reported are kept with their locations.
     
-    # Filter tasks for this path and check if they exist in task_library with the current intensity
-    available_tasks = []
-    for task in path_tasks[path]:
-        # Check if task exists and has the current intensity level
-        if (task in task_library and 
-            str(intensity) in task_library[task]["intensities"]):
-            available_tasks.append(task)
+    Args:
+        max_reported (int): Number of violations kept with their location
+    """
     
-    if len(available_tasks) < 2:
-        print(f"Warning: Not enough tasks available for {path} at intensity {intensity}")
-        # Fallback to using any tasks that are available
-        available_tasks = [task for task in task_library 
-                          if str(intensity) in task_library[task]["intensities"]]
+    def __init__(self, max_reported=100):
+        self.max_reported = max_reported
+        self.violations = []
+        self.counts = {}
+        self.num_challenges = 0
+        self.num_tasks = 0
+        self.challenge_ids = {}  # ID -> position of its first challenge
+        self.task_ids = set()
+        self.referenced = {}  # Task ID -> location of its first use
     
-    # Create 7 days of paired tasks
-    daily_tasks = []
-    used_task_pairs = set()  # Track task pairs to avoid exact duplicates
-    used_tasks_consecutive_days = []  # Track last day's tasks to avoid consecutive repetition
+    def report(self, kind, location, message):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        if len(self.violations) < self.max_reported:
+            self.violations.append((location, message))
     
-    for day in range(1, 8):
-        # Keep trying until we get a suitable pair
-        max_attempts = 20  # Prevent infinite loops
-        attempts = 0
-        
-        while attempts < max_attempts:
-            attempts += 1
-            
-            # Select two different tasks for this day
-            candidate_tasks = [t for t in available_tasks if t not in used_tasks_consecutive_days]
-            
-            # If we can't avoid consecutive repetition, use all available tasks
-            if len(candidate_tasks) < 2:
-                candidate_tasks = available_tasks
-            
-            # If still not enough tasks, show error and use what we have
-            if len(candidate_tasks) < 2:
-                print(f"Error: Not enough unique tasks for {path} path, intensity {intensity}, day {day}")
-                if len(available_tasks) >= 2:
-                    day_tasks = random.sample(available_tasks, 2)
-                else:
-                    # Extreme fallback - just use the first task twice if we have at least one
-                    task = available_tasks[0] if available_tasks else "meditation"
-                    day_tasks = [task, task]
-                break
-            
-            day_tasks = random.sample(candidate_tasks, 2)
-            day_tasks.sort()  # Sort to make comparison consistent
-            task_pair = tuple(day_tasks)
-            
-            # Avoid using the same pair of tasks twice
-            if task_pair not in used_task_pairs:
-                used_task_pairs.add(task_pair)
-                break
+    def check_task(self, task_id, entry):
+        """Check a taskLibrary entry"""
+        self.num_tasks += 1
+        self.task_ids.add(task_id)
+        location = f"taskLibrary {task_id}"
+        if task_id.rpartition('-')[2] not in [str(intensity) for intensity in INTENSITIES]:
+            self.report("task_id", location, "ID does not end with an intensity 1-5")
+        if not isinstance(entry, dict):
+            self.report("task_entry", location, "entry must be an object")
+            return
+        for field in ("task", "duration", "category"):
+            if not isinstance(entry.get(field), str):
+                self.report("task_entry", location, f"missing text field '{field}'")
+    
+    def check_challenge(self, challenge):
+        """Check a challenge's ID, path and intensity, and the task IDs of every day"""
+        position = self.num_challenges
+        self.num_challenges += 1
+        challenge_id = challenge.get("id") if isinstance(challenge, dict) else None
+        location = f"challenge #{position} ({challenge_id})"
+        if not isinstance(challenge_id, str):
+            self.report("challenge_id", location, "missing text 'id'")
+            return
         
-        # Format task IDs with intensity
-        task_ids = [f"{task}-{intensity}" for task in day_tasks]
+        if challenge_id in self.challenge_ids:
+            self.report("duplicate_id", location, f"ID already used by challenge #{self.challenge_ids[challenge_id]}")
+        else:
+            self.challenge_ids[challenge_id] = position
         
-        # Update tracking for consecutive days
-        used_tasks_consecutive_days = day_tasks
+        path = challenge.get("path")
+        intensity = challenge.get("intensity")
+        match = _CHALLENGE_ID.fullmatch(challenge_id)
+        if path not in PATH_CODES:
+            self.report("path", location, f"unknown path {path!r}")
+        if intensity not in INTENSITIES:
+            self.report("intensity", location, f"intensity {intensity!r} is not one of 1-5")
+        if not match or (path in PATH_CODES and match.group(1) != PATH_CODES[path]) or match.group(2) != str(intensity):
+            self.report("challenge_id", location, f"ID does not match path {path!r} and intensity {intensity!r}")
         
-        daily_tasks.append({
-            "dayNumber": day,
-            "tasks": task_ids
-        })
+        weeks = challenge.get("weeks")
+        if not isinstance(weeks, list) or not weeks:
+            self.report("weeks", location, "'weeks' must be a non-empty list")
+            return
+        suffix = f"-{intensity}"
+        for week_index, week in enumerate(weeks):
+            # Malformed weeks and days are reported where they are and skipped
+            if not isinstance(week, dict):
+                self.report("weeks", f"{location} week #{week_index}", "week must be an object")
+                continue
+            week_location = f"{location} week {week.get('weekNumber')}"
+            days = week.get("days", [])
+            if not isinstance(days, list):
+                self.report("days", week_location, "'days' must be a list")
+                continue
+            pairs = {}
+            previous = ()
+            for day_index, day in enumerate(days):
+                if not isinstance(day, dict):
+                    self.report("days", f"{week_location} day #{day_index}", "day must be an object")
+                    previous = ()
+                    continue
+                day_location = f"{week_location} day {day.get('dayNumber')}"
+                tasks = day.get("tasks")
+                if not isinstance(tasks, list) or not tasks:
+                    self.report("day_tasks", day_location, "'tasks' must be a non-empty list")
+                    previous = ()
+                    continue
+                if not all(isinstance(task_id, str) for task_id in tasks):
+                    self.report("day_tasks", day_location, f"task IDs must be text, got {tasks!r}")
+                    previous = ()
+                    continue
+                
+                for task_id in tasks:
+                    if task_id not in self.referenced:
+                        self.referenced[task_id] = day_location
+                    if not task_id.endswith(suffix):
+                        self.report("intensity_suffix", day_location,
+                                    f"task {task_id} does not match intensity {intensity}")
+                if len(set(tasks)) < len(tasks):
+                    self.report("repeated_task", day_location, f"a task appears twice: {', '.join(tasks)}")
+                
+                pair = tuple(sorted(tasks))
+                if pair in pairs:
+                    self.report("repeated_pair", day_location,
+                                f"pair {' + '.join(pair)} already used on day {pairs[pair]}")
+                else:
+                    pairs[pair] = day.get("dayNumber")
+                repeated = set(tasks).intersection(previous)
+                if repeated:
+                    self.report("consecutive_days", day_location,
+                                f"{', '.join(sorted(repeated))} also on the previous day")
+                previous = tasks
     
-    # Create the weekly plan
-    return {
-        "weekNumber": week_number,
-        "weeklyTrial": weekly_themes[path][week_number],
-        "days": daily_tasks
-    }
+    def finish(self):
+        """Resolve the task IDs used by challenges against taskLibrary; call once after the last record"""
+        for task_id, location in self.referenced.items():
+            if task_id not in self.task_ids:
+                self.report("unknown_task", location, f"task {task_id} is not in taskLibrary")
+        return sum(self.counts.values())
 
-def generate_challenge(path, intensity, task_library):
-    """Generate a complete 4-week challenge for a path and intensity"""
-    # Path code mapping
-    path_codes = {
-        "mental": "1",
-        "physical": "2", 
-        "balanced": "3"
-    }
-    
-    titles = {
-        "mental": {
-            1: "Mental Wellness Beginner",
-            2: "Mental Wellness Easy",
-            3: "Mental Wellness Intermediate",
-            4: "Mental Wellness Advanced",
-            5: "Mental Wellness Expert"
-        },
-        "physical": {
-            1: "Physical Wellness Beginner",
-            2: "Physical Wellness Easy",
-            3: "Physical Wellness Intermediate",
-            4: "Physical Wellness Advanced",
-            5: "Physical Wellness Expert"
-        },
-        "balanced": {
-            1: "Balanced Wellness Beginner",
-            2: "Balanced Wellness Easy",
-            3: "Balanced Wellness Intermediate",
-            4: "Balanced Wellness Advanced",
-            5: "Balanced Wellness Expert"
-        }
-    }
-    
-    descriptions = {
-        "mental": {
-            1: "Start your mental wellness journey with basic mindfulness, learning, and creativity activities",
-            2: "Build upon your mental wellness foundation with slightly more challenging activities",
-            3: "Develop a consistent mental wellness practice with medium-intensity activities",
-            4: "Challenge yourself with advanced mental wellness practices",
-            5: "Master intensive mental wellness techniques for long-term growth"
-        },
-        "physical": {
-            1: "Start your physical wellness journey with gentle exercise and movement",
-            2: "Build upon your physical foundation with slightly more challenging activities",
-            3: "Develop consistent fitness habits with medium-intensity exercises",
-            4: "Challenge yourself with advanced physical training",
-            5: "Master intensive physical training for peak performance"
-        },
-        "balanced": {
-            1: "Develop a holistic approach to wellness with a balance of mental and physical activities",
-            2: "Build a more consistent wellness routine with slightly more challenging activities",
-            3: "Integrate medium-intensity activities into a balanced wellness practice",
-            4: "Challenge yourself with advanced mental and physical techniques",
-            5: "Master intensive wellness practices for optimal mind-body health"
-        }
-    }
+def iter_quest_records(quest_path):
+    """
+    Yield the challenges and taskLibrary entries of a quest file of any format
     
-    # Generate 4 weeks of plans
-    weeks = []
-    for week in range(1, 5):
-        weeks.append(generate_weekly_plan(path, intensity, week, task_library))
+    Quest.json and Quest.ndjson are read one value at a time and a Quest.bin
+    store is decoded one challenge at a time; Quest.min.json is loaded whole.
     
-    # Create the complete challenge with new ID format
-    return {
-        "id": f"{path_codes[path]}-{intensity}", # Use path_codes instead of path name
-        "path": path,
-        "intensity": intensity,
-        "title": titles[path][intensity],
-        "description": descriptions[path][intensity],
-        "weeks": weeks
-    }
+    Yields:
+        tuple: ("challenge", challenge) or ("task", (task_id, entry))
+    """
+    output_format = format_for_path(quest_path)
+    if output_format == "pretty":
+        with open(quest_path, 'rb') as f:
+            for kind, value, _, _ in scan_quest_file(f):
+                yield kind, value
+    elif output_format == "ndjson":
+        with open(quest_path, 'r', encoding='utf8') as f:
+            for task in json.loads(f.readline())["taskLibrary"].items():
+                yield "task", task
+            for line in f:
+                if line.strip():
+                    yield "challenge", json.loads(line)
+    elif output_format == "binary":
+        store = open_quest_store(quest_path)
+        try:
+            for task in store.task_library.items():
+                yield "task", task
+            for challenge in store:
+                yield "challenge", challenge
+        finally:
+            store.close()
+    else:
+        quests = load_quests(quest_path)
+        for task in quests["taskLibrary"].items():
+            yield "task", task
+        for challenge in quests["progressiveChallenges"]:
+            yield "challenge", challenge
 
-def generate_quest_json(num_variations=1):
-    """Generate a complete Quest.json file with challenges at different intensity levels"""
-    # Load the task library
-    task_library = load_task_library()
+def validate_quest_file(quest_path, max_reported=100):
+    """
+    Check a quest file in one pass and print the violations with their locations
     
-    # Create quests structure
-    quests = {
-        "progressiveChallenges": [],
-        "taskLibrary": {}
-    }
+    Checks that challenge IDs are unique and match their path and intensity,
+    that every day's task IDs exist in taskLibrary and carry the challenge's
+    intensity, and that within a week no task appears twice on a day or on
+    two consecutive days, and no pair of tasks repeats.
     
-    # Generate challenges for each path and intensity combination
-    paths = ["mental", "physical", "balanced"]
-    intensities = [1, 2, 3, 4, 5]
+    Args:
+        quest_path (str): Quest file, in any of OUTPUT_FORMATS
+        max_reported (int): Number of violations printed with their location
+        
+    Returns:
+        int: Number of violations found
+    """
+    validator = QuestValidator(max_reported)
+    start = time.perf_counter()
+    for kind, value in iter_quest_records(quest_path):
+        if kind == "challenge":
+            validator.check_challenge(value)
+        else:
+            validator.check_task(*value)
+    total = validator.finish()
+    elapsed = time.perf_counter() - start
     
-    for path in paths:
-        for intensity in intensities:
-            for variation in range(1, num_variations + 1):
-                challenge = generate_challenge(path, intensity, task_library)
-                
-                # Add variation suffix if multiple variations
-                if num_variations > 1:
-                    challenge["id"] = f"{challenge['id']}-{variation}"  # Just add the number
-                    challenge["title"] = f"{challenge['title']} ({variation})"  # No "Variation" text
-                
-                quests["progressiveChallenges"].append(challenge)
-                print(f"Generated: {challenge['title']}")
+    print(f"Checked {validator.num_challenges} challenges and {validator.num_tasks} taskLibrary entries "
+          f"of {quest_path} in {elapsed:.2f}s")
+    for location, message in validator.violations:
+        print(f"  {location}: {message}")
+    if total > len(validator.violations):
+        print(f"  ... and {total - len(validator.violations)} more")
+    if total:
+        print("Violations by kind: " + ", ".join(f"{kind} {count}" for kind, count in sorted(validator.counts.items())))
+    else:
+        print("No problems found")
+    return total
+
+def open_quest_index(quest_path):
+    """
+    Index an existing quest file without loading it: a QuestStore for Quest.bin,
+    a LazyQuestIndex for Quest.json, and a QuestIndex for the other formats
     
-    # Prepare the task library for the output file
-    for task_id, task_info in task_library.items():
-        for intensity in intensities:
-            intensity_key = str(intensity)
-            if intensity_key in task_info["intensities"]:
-                full_task_id = f"{task_id}-{intensity}"
-                quests["taskLibrary"][full_task_id] = {
-                    "task": task_info["task"],
-                    "duration": task_info["intensities"][intensity_key]["duration"],
-                    "category": task_info["category"]
-                }
-    
-    # Write to Quest.json
-    quest_json_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Quest.json')
-    with open(quest_json_path, 'w', encoding='utf8') as f:
-        json.dump(quests, f, indent=2)
-    
-    print(f"Successfully generated Quest.json with {len(quests['progressiveChallenges'])} challenges")
-    print(f"File saved to: {quest_json_path}")
+    Raises:
+        ValueError: If the file cannot be read as its format
+    """
+    output_format = format_for_path(quest_path)
+    if output_format == "binary":
+        return open_quest_store(quest_path)
+    if output_format == "pretty":
+        try:
+            return LazyQuestIndex(quest_path)
+        except KeyError as e:
+            raise ValueError(f"challenge without {e}") from None
+    return QuestIndex(load_quests(quest_path))
 
-    return quests
+def query_quests(index, queries, out):
+    """
+    Resolve many challenge codes and write the results as JSON lines
+    
+    Every code is normalized with normalize_path_code and each distinct code is
+    resolved once against the index. Each line holds the query, its normalized
+    key, the matching challenges and the taskLibrary entries they use, or an
+    error if nothing matches.
+    
+    Args:
+        index: QuestIndex, LazyQuestIndex or QuestStore
+        queries (iterable): Codes such as "12", "1-2" or "1-2-7"; blank ones are skipped
+        out: Text stream to write to
+        
+    Returns:
+        tuple: (number of queries, number that matched nothing)
+    """
+    resolved = {}
+    total = 0
+    missing = 0
+    for query in queries:
+        query = query.strip()
+        if not query:
+            continue
+        total += 1
+        key = normalize_path_code(query)
+        if key not in resolved:
+            challenges = index.find(key)
+            task_ids = dict.fromkeys(task_id for challenge in challenges for week in challenge["weeks"]
+                                     for day in week["days"] for task_id in day["tasks"])
+            line = {"challenges": challenges,
+                    "taskLibrary": {task_id: index.task_library[task_id] for task_id in task_ids
+                                    if task_id in index.task_library}}
+            # Encode once; repeated queries reuse the text
+            resolved[key] = (json.dumps(line, separators=(',', ':'), default=materialize_challenge)[1:]
+                             if challenges else None)
+        
+        head = json.dumps({"query": query, "key": key}, separators=(',', ':'))[:-1]
+        if resolved[key] is None:
+            missing += 1
+            out.write(head + ',"error":"no challenge matches"}\n')
+        else:
+            out.write(head + ',' + resolved[key] + '\n')
+    return total, missing
 
-def read_quests():
-    """Read existing Quest.json file or generate a new one"""
-    quest_json_path = os.path.join(os.path.dirname(__file__), 'Quest.json')
+def read_quests(quest_json_path=None):
+    """
+    Read existing Quest.json file (assets/Quest.json by default) or generate a new one, and index it
+    
+    Quest.json is indexed by byte offsets with LazyQuestIndex and a Quest.bin
+    store is opened as a QuestStore; both decode challenges on demand.
+    """
+    quest_json_path = quest_json_path or os.path.join(os.path.dirname(__file__), 'Quest.json')
+    if os.path.exists(quest_json_path) and quest_json_path.endswith(OUTPUT_FORMATS["binary"][len("Quest"):]):
+        try:
+            store = open_quest_store(quest_json_path)
+            print(f"Opened quest store with {len(store)} challenges")
+            return store
+        except ValueError as e:
+            print(f"Error reading {quest_json_path}: {e}")
+            print("Generating new quests...")
+            return QuestIndex(generate_quest_json())
     if (os.path.exists(quest_json_path)):
         try:
-        with open(quest_json_path, 'r', encoding='utf8') as f:
-            quests = json.load(f)
-            print(f"Loaded existing Quest.json with {len(quests['progressiveChallenges'])} challenges")
-        return quests
-        except (json.JSONDecodeError, KeyError) as e:
+            index = LazyQuestIndex(quest_json_path)
+            print(f"Loaded existing Quest.json with {len(index)} challenges")
+            return index
+        except (ValueError, KeyError) as e:
             print(f"Error reading Quest.json: {e}")
             print("Generating new quests...")
-            return generate_quest_json()
+            return QuestIndex(generate_quest_json())
     else:
         print("Quest.json not found. Generating new quests...")
-        return generate_quest_json()
+        return QuestIndex(generate_quest_json())
 
 def normalize_path_code(path_to_code):
     """
@@ -309,10 +3122,12 @@ def display_quest_info(quest):
     print(f"ID: {quest['id']}")
     print(f"Title: {quest['title']}")
     print(f"Description: {quest['description']}")
+    if "totalMinutes" in quest:
+        print(f"Workload: {quest['totalMinutes']} minutes, {quest['untimedTasks']} untimed tasks")
     print("-" * 80)
 
-def edit_quest(quests):
-    """Interactive function to edit the quests"""
+def edit_quest(index):
+    """Interactive function to edit the quests held by a QuestIndex or QuestStore"""
     while True:
         print("\n" + "-" * 80)
         print("Quest Generation Utility")
@@ -334,28 +3149,9 @@ def edit_quest(quests):
             quest_json_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Quest.json')
             print(f"Quest.json will be saved to: {quest_json_path}")
             
-            # First ensure the old file is deleted if it exists
-            try:
-                if (os.path.exists(quest_json_path)):
-                    # Force file close in case it's being held open
-                    import gc
-                    gc.collect()  # Run garbage collection to close any lingering file handles
-                    
-                    # Try to remove the file
-                    os.remove(quest_json_path)
-                    print(f"Old Quest.json file removed successfully from: {quest_json_path}")
-            except Exception as e:
-                print(f"Warning: Could not remove old file: {e}")
-            
-            # Generate new quests
-            quests = generate_quest_json()
-            
-            # Verify the file exists with the correct content
-            if os.path.exists(quest_json_path):
-                file_size = os.path.getsize(quest_json_path)
-                print(f"Verified: New Quest.json file created with size {file_size} bytes.")
-            else:
-                print("Warning: Failed to create new Quest.json file.")
+            # Release the file being browsed; the new one replaces it with an atomic rename
+            index.close()
+            index = QuestIndex(generate_quest_json())
             
         elif action == 'V':
             try:
@@ -370,7 +3166,8 @@ def edit_quest(quests):
                         continue
                 
                 print(f"\nGenerating Quest.json with {num_variations} variations per path-intensity...")
-                quests = generate_quest_json(num_variations)
+                index.close()
+                index = QuestIndex(generate_quest_json(num_variations))
                 
             except ValueError:
                 print("Invalid input. Please enter a number.")
@@ -378,10 +3175,9 @@ def edit_quest(quests):
         elif action == 'R':
             # First, show available paths to help the user
             print("\nAvailable paths:")
-            if 'progressiveChallenges' in quests:
-                unique_paths = sorted(set(q['id'] for q in quests['progressiveChallenges']))
-                for i, path in enumerate(unique_paths):
-                    print(f"{i+1}. {path}")
+            if len(index):
+                for i, path in enumerate(index.base_ids()):
+                    print(f"{i+1}. {path} ({index.count(path)} quests)")
             else:
                 print("No paths available. Please generate quests first.")
                 continue
@@ -390,6 +3186,7 @@ def edit_quest(quests):
             print("Instructions for path selection:")
             print("Enter a path code like '1-2' (path 1, intensity 2)")
             print("You can also enter '12' which will be converted to '1-2'")
+            print("Enter a variation ID like '1-2-3' to pick a single quest")
             print("A: Show all quests")
             print("B: Back to main menu")
             print("E: Exit program")
@@ -403,7 +3200,7 @@ def edit_quest(quests):
             if path_to_code.upper() == 'A':
                 print("\nShowing all quests:")
                 print("-" * 80)
-                for idx, quest in enumerate(quests['progressiveChallenges']):
+                for idx, quest in enumerate(index):
                     print(f"Quest {idx}: ID: {quest['id']} | Title: {quest['title']}")
                 print("-" * 80)
                 input("Press Enter to continue...")
@@ -413,7 +3210,7 @@ def edit_quest(quests):
             normalized_path = normalize_path_code(path_to_code)
             print(f"\nLooking for quests with path '{normalized_path}'...")
             
-            filtered_quests = [q for q in quests['progressiveChallenges'] if q['id'] == normalized_path]
+            filtered_quests = index.find(normalized_path)
             
             if not filtered_quests:
                 print(f"\nNo quests found with path '{normalized_path}'. Please try again.")
@@ -443,16 +3240,16 @@ def edit_quest(quests):
             
             print("\nOptions:")
             print("Enter a number to see more details about that quest")
-                print("B: Back to path selection")
-                print("E: Exit program")
+            print("B: Back to path selection")
+            print("E: Exit program")
             
             option = input("Your choice: ").strip()
                 
             if option.upper() == 'E':
                 print("\nExiting program.")
-                    return
+                return
             if option.upper() == 'B':
-                    continue
+                continue
                 
             try:
                 idx = int(option)
@@ -467,15 +3264,7 @@ def edit_quest(quests):
                             print(f"\nWeek {week['weekNumber']}: {week['weeklyTrial']}")
                             for day in week['days']:
                                 # Lookup task details from taskLibrary
-                                task_details = []
-                                for task_id in day['tasks']:
-                                    if task_id in quests['taskLibrary']:
-                                        task_info = quests['taskLibrary'][task_id]
-                                        task_details.append(f"{task_info['task']} ({task_info['duration']})")
-                    else:
-                                        task_details.append(task_id)
-                                
-                                tasks_str = ", ".join(task_details)
+                                tasks_str = ", ".join(index.task_label(task_id) for task_id in day['tasks'])
                                 print(f"  Day {day['dayNumber']}: {tasks_str}")
                     
                     input("\nPress Enter to continue...")
@@ -487,6 +3276,487 @@ def edit_quest(quests):
         else:
             print("\nInvalid option. Please enter E, R, G, or V.")
 
+# Axes of the P-D-T-C class code, used when classes.json's util maps are not keyed 1..n
+CLASS_DIFFICULTIES = ["Daily Trials", "Epic Missions", "Relentless Campaign", "Seasonal Conquests", "Spartan Trials"]
+CLASS_TRACKINGS = ["Leveling System", "Streaks & Habits", "Both"]
+CLASS_CONSEQUENCES = ["Yes, Bring It On", "Choose My Own Punishments", "Without Consequence"]
+
+def _class_axis(util_map, default):
+    """Return the names of one class axis in code order, from a util map keyed "1".."n" if there is one"""
+    if util_map and sorted(util_map) == [str(code) for code in range(1, len(util_map) + 1)]:
+        return [util_map[str(code)] for code in range(1, len(util_map) + 1)]
+    return default
+
+def class_quest_format_suffix(tracking, consequence):
+    """Return the quest format suffix of a tracking and consequence code, as class_generation.js builds it"""
+    if tracking == 2:
+        # Streaks get their own wording
+        return {1: " with strict consequences for broken streaks",
+                2: " with self-imposed streak consequences",
+                3: " with flexible streaks"}.get(consequence, "")
+    
+    suffix = {1: " with strict consequences", 2: " with self-imposed consequences", 3: " with no penalties"}.get(consequence, "")
+    if tracking == 3:
+        suffix += {1: " and dual tracking", 2: " and comprehensive tracking", 3: " and dual tracking"}.get(consequence, "")
+    return suffix
+
+def compile_class_table(classes_path='assets/classes.json', options_path='assets/Option_Description.json',
+                        quest_json_path=None):
+    """
+    Compile classes.json, Option_Description.json and the quest IDs into one flat table
+    
+    Every P-D-T-C code maps to its class name, the precomputed description and
+    quest format of class_generation.js, the onboarding option descriptions,
+    the legacy class entry the app used to look up, and the quest group the
+    difficulty selects ("P-D" in Quest.json).
+    
+    Args:
+        classes_path (str): classes.json
+        options_path (str): Option_Description.json
+        quest_json_path (str): Quest.json whose IDs are checked (assets/Quest.json by default)
+        
+    Returns:
+        dict: The table, keyed by P-D-T-C code
+        
+    Raises:
+        ValueError: If a combination has no class, template, consequence
+            description or option description, or its quest group is not in Quest.json
+    """
+    try:
+        with open(classes_path, 'r', encoding='utf8') as f:
+            classes = json.load(f)
+        with open(options_path, 'r', encoding='utf8') as f:
+            options = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}") from None
+    
+    quest_json_path = quest_json_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Quest.json')
+    quests = LazyQuestIndex(quest_json_path)
+    quests.close()
+    
+    util = classes.get("util", {})
+    path_names = _class_axis(util.get("pathMap"), ["Mind", "Body", "Balanced"])
+    difficulties = _class_axis(util.get("difficultyMap"), CLASS_DIFFICULTIES)
+    trackings = _class_axis(util.get("trackingMap"), CLASS_TRACKINGS)
+    consequences = _class_axis(util.get("consequenceMap"), CLASS_CONSEQUENCES)
+    legacy_classes = {entry["key"]: entry for entry in classes.get("classes", [])}
+    quest_paths = {code: name for name, code in PATH_CODES.items()}
+    
+    table = {}
+    errors = []
+    for p, path_name in enumerate(path_names, start=1):
+        for d, difficulty in enumerate(difficulties, start=1):
+            template = classes.get("questTemplates", {}).get(path_name, {}).get(difficulty)
+            quest_id = f"{p}-{d}"
+            quest_path = quest_paths.get(str(p))
+            if template is None:
+                errors.append(f"questTemplates has no {path_name} / {difficulty}")
+            if quest_path is None or quests.count(quest_id) == 0:
+                errors.append(f"Quest.json has no challenges for {quest_id}")
+            
+            for t, tracking in enumerate(trackings, start=1):
+                for c, consequence in enumerate(consequences, start=1):
+                    key = f"{p}-{d}-{t}-{c}"
+                    class_name = (classes.get("classMapping", {}).get(path_name, {})
+                                  .get(difficulty, {}).get(tracking, {}).get(consequence))
+                    modifier = classes.get("consequenceModifiers", {}).get(consequence)
+                    if class_name is None:
+                        errors.append(f"classMapping has no class for {key}")
+                    if modifier is None:
+                        errors.append(f"consequenceModifiers has no {consequence}")
+                    option_keys = {"path": f"{p}-0-0-0", "difficulty": f"0-{d}-0-0",
+                                   "tracking": f"0-0-{t}-0", "consequence": f"0-0-0-{c}"}
+                    missing_options = [option_key for option_key in option_keys.values()
+                                       if not isinstance(options.get(option_key), str)]
+                    for option_key in missing_options:
+                        errors.append(f"Option_Description has no {option_key}")
+                    if (class_name is None or modifier is None or template is None or missing_options
+                            or not quests.count(quest_id)):
+                        continue
+                    
+                    # The key User_Classification.tsx looked up in the old classes list
+                    legacy_key = f"{p}-{'beginner' if d <= 3 else 'epic'}-{'consequence' if c == 1 else 'noconsequence'}"
+                    legacy = legacy_classes.get(legacy_key, {})
+                    
+                    table[key] = {
+                        "key": key,
+                        "path": path_name,
+                        "difficulty": difficulty,
+                        "tracking": tracking,
+                        "consequence": consequence,
+                        "class": class_name,
+                        "description": (f"A {path_name.lower()} focused hero who faces {difficulty.lower()} "
+                                        f"with {tracking.lower()} tracking and embraces {consequence.lower()}."),
+                        "quest_format": template["format"] + class_quest_format_suffix(t, c),
+                        "consequence_description": modifier["description"],
+                        "options": {axis: options[option_key] for axis, option_key in option_keys.items()},
+                        "legacy_key": legacy_key,
+                        "model": legacy.get("model", ""),
+                        "quest": {
+                            "id": quest_id,
+                            "title": CHALLENGE_TITLES[quest_path][d],
+                            "description": CHALLENGE_DESCRIPTIONS[quest_path][d],
+                            "variations": quests.count(quest_id)
+                        }
+                    }
+    
+    if errors:
+        # Report each problem once
+        raise ValueError("Cannot compile the class table:\n  " + "\n  ".join(dict.fromkeys(errors)))
+    return table
+
+def write_class_table(output_path=None, **kwargs):
+    """Compile the class table and write it next to classes.json as ClassTable.json"""
+    table = compile_class_table(**kwargs)
+    output_path = output_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ClassTable.json')
+    written = write_if_changed(output_path, json.dumps({
+        "_description": "P-D-T-C class code -> class, descriptions, onboarding options and quest group. "
+                        "Generated by generate_quests.py --compile-classes; do not edit.",
+        "classes": table
+    }, indent=2, ensure_ascii=False).encode('utf8'))
+    print(f"Compiled {len(table)} class combinations")
+    report_write(output_path, written)
+    return table
+
+# Asset bundle (AssetBundle.json): every JSON asset the app ships, with shared strings
+ASSET_BUNDLE_VERSION = 1
+ASSET_BUNDLE_NAME = "AssetBundle.json"
+
+# Where each asset's strings are interned: under these keys at any depth, or
+# everywhere for "" (the root). These parts may hold no numbers, so a number
+# in them is always a string reference.
+ASSET_INTERNED_FIELDS = {
+    "Quest.json": ["path", "title", "description", "weeklyTrial", "tasks", "task", "duration", "category"],
+    "Quote.json": [""],
+    "TaskLibrary.json": [""],
+    "classes.json": [""],
+    "Option_Description.json": [""]
+}
+
+def _walk_interned(value, fields, visit, interned=False):
+    """Rebuild value, passing every string or number inside interned fields through visit"""
+    if isinstance(value, dict):
+        return {key: _walk_interned(item, fields, visit, interned or key in fields) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_walk_interned(item, fields, visit, interned) for item in value]
+    if interned and (isinstance(value, str) or (isinstance(value, int) and not isinstance(value, bool))):
+        return visit(value)
+    return value
+
+def prune_asset(name, data):
+    """
+    Drop the parts of an asset the app never reads
+    
+    Top-level keys starting with "_" are comments (such as classes.json's
+    _description), and Quest.json taskLibrary entries that no challenge uses
+    are unreachable.
+    """
+    if isinstance(data, dict):
+        data = {key: value for key, value in data.items() if not key.startswith("_")}
+    if name == "Quest.json":
+        used = {task_id for challenge in data["progressiveChallenges"] for week in challenge["weeks"]
+                for day in week["days"] for task_id in day["tasks"]}
+        data["taskLibrary"] = {task_id: entry for task_id, entry in data["taskLibrary"].items() if task_id in used}
+    return data
+
+def compile_asset_bundle(assets):
+    """
+    Combine assets into one bundle with a shared string table
+    
+    Strings used more than once inside the interned fields of
+    ASSET_INTERNED_FIELDS are stored once in "strings", most frequent first so
+    the common ones get the shortest numbers, and replaced by their index.
+    Strings used once stay inline.
+    
+    Args:
+        assets (dict): Asset file name -> parsed (and pruned) content
+        
+    Returns:
+        dict: The bundle, which expand_asset_bundle turns back into assets
+        
+    Raises:
+        ValueError: If an interned field of an asset holds a number
+    """
+    counts = {}
+    
+    def count(value):
+        if not isinstance(value, str):
+            raise ValueError(f"number {value} in an interned field; only strings can be interned")
+        counts[value] = counts.get(value, 0) + 1
+        return value
+    
+    for name, data in assets.items():
+        try:
+            _walk_interned(data, ASSET_INTERNED_FIELDS[name], count, "" in ASSET_INTERNED_FIELDS[name])
+        except ValueError as e:
+            raise ValueError(f"{name}: {e}") from None
+    
+    # Sorting is stable, so equally frequent strings keep their first-seen order
+    strings = sorted((value for value, seen in counts.items() if seen > 1), key=lambda value: -counts[value])
+    string_index = {value: index for index, value in enumerate(strings)}
+    
+    files = {}
+    for name, data in assets.items():
+        fields = ASSET_INTERNED_FIELDS[name]
+        files[name] = _walk_interned(data, fields, lambda value: string_index.get(value, value), "" in fields)
+    return {
+        "bundleVersion": ASSET_BUNDLE_VERSION,
+        "strings": strings,
+        "fields": {name: ASSET_INTERNED_FIELDS[name] for name in assets},
+        "files": files
+    }
+
+def expand_asset_bundle(bundle, names=None):
+    """
+    Turn a bundle from compile_asset_bundle back into its assets
+    
+    Args:
+        bundle (dict): The parsed bundle
+        names (list): Assets to expand, all of them by default
+        
+    Returns:
+        dict: Asset file name -> content
+        
+    Raises:
+        ValueError: If the bundle is of another version
+    """
+    if bundle.get("bundleVersion") != ASSET_BUNDLE_VERSION:
+        raise ValueError(f"asset bundle version {bundle.get('bundleVersion')} is not supported "
+                         f"(expected {ASSET_BUNDLE_VERSION})")
+    strings = bundle["strings"]
+    
+    def resolve(value):
+        return strings[value] if isinstance(value, int) else value
+    
+    assets = {}
+    for name in names or bundle["files"]:
+        fields = bundle["fields"][name]
+        assets[name] = _walk_interned(bundle["files"][name], fields, resolve, "" in fields)
+    return assets
+
+def read_asset_bundle(bundle_path=None, names=None):
+    """Load assets from AssetBundle.json (next to this script by default), see expand_asset_bundle"""
+    bundle_path = bundle_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), ASSET_BUNDLE_NAME)
+    with open(bundle_path, 'rb') as f:
+        return expand_asset_bundle(json.loads(f.read()), names)
+
+def write_asset_bundle(asset_dir=None, output_path=None, repeat=5):
+    """
+    Compile the JSON assets into AssetBundle.json and print a size report
+    
+    The report shows every asset's size as shipped, minified and inside the
+    bundle, and the time to parse all the assets against the time to parse
+    and expand the bundle. The bundle is expanded before it is saved, and
+    compiling fails unless that gives back the pruned assets.
+    
+    Args:
+        asset_dir (str): Folder holding the assets, the assets folder by default
+        output_path (str): Bundle to write, AssetBundle.json in asset_dir by default
+        repeat (int): Parse timings are the best of this many runs
+        
+    Returns:
+        dict: The bundle
+        
+    Raises:
+        ValueError: If an asset is not valid JSON or the bundle does not round-trip
+    """
+    asset_dir = asset_dir or os.path.dirname(os.path.abspath(__file__))
+    output_path = output_path or os.path.join(asset_dir, ASSET_BUNDLE_NAME)
+    
+    sources = {}
+    assets = {}
+    for name in ASSET_INTERNED_FIELDS:
+        with open(os.path.join(asset_dir, name), 'rb') as f:
+            sources[name] = f.read()
+        try:
+            assets[name] = prune_asset(name, json.loads(sources[name]))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{name} is not valid JSON: {e}") from None
+    
+    bundle = compile_asset_bundle(assets)
+    data = json.dumps(bundle, separators=(',', ':'), ensure_ascii=False).encode('utf8')
+    if expand_asset_bundle(json.loads(data)) != assets:
+        raise ValueError("the asset bundle does not expand back to the assets")
+    written = write_if_changed(output_path, data)
+    
+    def best_time(parse):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse()
+            times.append(time.perf_counter() - start)
+        return min(times)
+    
+    print(f"{'Asset':<26}{'Shipped':>10}{'Minified':>10}{'Bundled':>10}")
+    total_minified = 0
+    for name in ASSET_INTERNED_FIELDS:
+        minified = len(json.dumps(json.loads(sources[name]), separators=(',', ':'), ensure_ascii=False).encode('utf8'))
+        bundled = len(json.dumps(bundle["files"][name], separators=(',', ':'), ensure_ascii=False).encode('utf8'))
+        total_minified += minified
+        print(f"{name:<26}{len(sources[name]):>10}{minified:>10}{bundled:>10}")
+    strings_size = len(json.dumps(bundle["strings"], separators=(',', ':'), ensure_ascii=False).encode('utf8'))
+    print(f"{'(shared strings)':<26}{'':>10}{'':>10}{strings_size:>10}")
+    shipped = sum(len(source) for source in sources.values())
+    print(f"{'Total':<26}{shipped:>10}{total_minified:>10}{len(data):>10}  ({len(data) / shipped:.1%} of shipped, "
+          f"{len(bundle['strings'])} shared strings)")
+    
+    source_time = best_time(lambda: [json.loads(source) for source in sources.values()])
+    bundle_time = best_time(lambda: json.loads(data))
+    expand_time = best_time(lambda: expand_asset_bundle(json.loads(data)))
+    print(f"Parse time: {source_time * 1000:.2f}ms for the assets, {bundle_time * 1000:.2f}ms for the bundle, "
+          f"{expand_time * 1000:.2f}ms with every asset expanded")
+    report_write(output_path, written)
+    return bundle
+
+def parse_challenge_key(key):
+    """
+    Parse the "{path}-{intensity}" part of a challenge URL
+    
+    Args:
+        key (str): A path code or name and an intensity, such as "1-2" or "mental-2"
+        
+    Returns:
+        tuple: The path name and the intensity
+        
+    Raises:
+        ValueError: If the path or the intensity is unknown
+    """
+    path, _, intensity = key.rpartition('-')
+    path_names = {code: name for name, code in PATH_CODES.items()}
+    path = path_names.get(path, path)
+    if path not in PATHS or not intensity.isdigit() or int(intensity) not in INTENSITIES:
+        raise ValueError(f"Unknown challenge {key}; use a path code or name and an intensity, such as 1-2")
+    return path, int(intensity)
+
+class ChallengeService:
+    """
+    Generate single challenges on request from a task library loaded once
+    
+    A challenge for a path, intensity and seed is the one a Quest.json run
+    with that seed and one variation holds. Responses are rendered once and
+    kept in a bounded LRU cache; cache hits and misses are counted.
+    
+    Args:
+        task_library (TaskLibrary): Task library to generate from
+        engine (str): Engine that picks the daily task pairs, one of ENGINES
+        cache_size (int): Maximum number of responses kept in the cache
+    """
+    
+    def __init__(self, task_library, engine="sampler", cache_size=1024):
+        self.task_library = task_library
+        self.engine = engine
+        self.task_library_output = build_task_library_output(task_library)
+        self.response = functools.lru_cache(maxsize=cache_size)(self._render)
+        self.requests = 0
+        self._lock = threading.Lock()
+    
+    def _render(self, path, intensity, seed):
+        """Generate a challenge and return the JSON response with the taskLibrary entries it uses"""
+        challenge = generate_variation(path, intensity, 1, 1, self.engine, seed, self.task_library)
+        task_ids = sorted({task_id for week in challenge["weeks"] for day in week["days"] for task_id in day["tasks"]})
+        return json.dumps({
+            "seed": seed,
+            "challenge": challenge,
+            "taskLibrary": {task_id: self.task_library_output[task_id]
+                            for task_id in task_ids if task_id in self.task_library_output}
+        }).encode('utf8')
+    
+    def challenge(self, path, intensity, seed):
+        """Return the JSON response for a challenge, from the cache when possible"""
+        with self._lock:
+            self.requests += 1
+        return self.response(path, intensity, seed)
+    
+    def metrics(self):
+        """Return the request count and the cache statistics"""
+        info = self.response.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "requests": self.requests,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+            "cache_hit_rate": round(info.hits / lookups, 4) if lookups else None,
+            "cache_size": info.currsize,
+            "cache_max_size": info.maxsize
+        }
+
+class ChallengeRequestHandler(BaseHTTPRequestHandler):
+    """Serve GET /challenge/{path}-{intensity}?seed=N and GET /metrics from the server's ChallengeService"""
+    
+    def send_json(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_error_json(self, status, message):
+        self.send_json(status, json.dumps({"error": message}).encode('utf8'))
+    
+    def do_GET(self):
+        service = self.server.service
+        url = urllib.parse.urlsplit(self.path)
+        
+        if url.path == "/metrics":
+            self.send_json(200, json.dumps(service.metrics()).encode('utf8'))
+            return
+        if not url.path.startswith("/challenge/"):
+            self.send_error_json(404, f"Not found: {url.path}")
+            return
+        
+        try:
+            path, intensity = parse_challenge_key(url.path[len("/challenge/"):])
+        except ValueError as e:
+            self.send_error_json(404, str(e))
+            return
+        
+        # Without a seed the challenge is a fresh random one; the seed is in the response
+        query = urllib.parse.parse_qs(url.query)
+        try:
+            seed = int(query["seed"][0]) if "seed" in query else random.randrange(2**32)
+        except ValueError:
+            self.send_error_json(400, f"seed must be an integer, got {query['seed'][0]}")
+            return
+        
+        try:
+            body = service.challenge(path, intensity, seed)
+        except ValueError as e:
+            self.send_error_json(500, str(e))
+            return
+        self.send_json(200, body)
+
+def serve_challenges(host="127.0.0.1", port=8000, engine="sampler", cache_size=1024,
+                     library_path='assets/TaskLibrary.json'):
+    """
+    Run the challenge HTTP service until interrupted
+    
+    Every request is handled in its own thread, so slow clients do not hold
+    up the others.
+    
+    Args:
+        host (str): Address to listen on
+        port (int): Port to listen on
+        engine (str): Engine that picks the daily task pairs, one of ENGINES
+        cache_size (int): Maximum number of responses kept in the LRU cache
+        library_path (str): Task library to generate from
+    """
+    if engine == "numpy":
+        require_numpy()
+    service = ChallengeService(load_task_library(library_path=library_path), engine, cache_size)
+    
+    server = ThreadingHTTPServer((host, port), ChallengeRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    print(f"Serving challenges on http://{host}:{server.server_address[1]}/challenge/{{path}}-{{intensity}}?seed=N")
+    print(f"Cache metrics on http://{host}:{server.server_address[1]}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping the challenge service.")
+    finally:
+        server.server_close()
+        print(f"Final metrics: {json.dumps(service.metrics())}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate Quest.json with progressive challenges')
     parser.add_argument('--variations', '-v', type=int, default=1, 
@@ -495,15 +3765,153 @@ if __name__ == "__main__":
                         help='Generate new Quest.json file without interactive mode')
     parser.add_argument('--interactive', '-i', action='store_true',
                         help='Run in interactive mode')
+    parser.add_argument('--engine', '-e', choices=ENGINES, default='sampler',
+                        help='How daily task pairs are picked (default: sampler)')
+    parser.add_argument('--seed', '-s', type=int, default=None,
+                        help='Seed for a reproducible Quest.json (random if omitted)')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Number of processes generating challenges, 0 for one per core (default: 1)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write challenges to Quest.json as they are generated, in constant memory')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted --stream run from where it stopped')
+    parser.add_argument('--format', '-f', choices=list(OUTPUT_FORMATS), default='pretty', dest='output_format',
+                        help='Output format: pretty (Quest.json), compact (Quest.min.json), ndjson (Quest.ndjson) '
+                             'or binary (Quest.bin, a store read without loading it)')
+    parser.add_argument('--format-report', action='store_true',
+                        help='Print the size and parse time of every output format after generating')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only regenerate challenges whose TaskLibrary inputs changed since the last incremental run')
+    parser.add_argument('--stats', nargs='?', const='generate_quests_stats.json', metavar='FILE',
+                        help='Print stage timings and sampler counters, and save them as JSON '
+                             '(default file: generate_quests_stats.json)')
+    parser.add_argument('--profile', nargs='?', const='generate_quests.prof', metavar='FILE',
+                        help='Also run cProfile and dump it (default file: generate_quests.prof); implies --stats. '
+                             'Only the main process is profiled when --workers is above 1')
+    
+    parser.add_argument('--shards', action='store_true',
+                        help='Write one quest file per path and intensity to assets/QuestShards, with a manifest')
+    parser.add_argument('--diff-against', metavar='OLD', default=None,
+                        help='Also write a patch from the quest file OLD to the new one, e.g. Quest.patch.json')
+    parser.add_argument('--apply-patch', nargs=3, metavar=('OLD', 'PATCH', 'DEST'),
+                        help='Apply a patch to the quest file OLD and write the result to DEST')
+    
+    parser.add_argument('--query', nargs='*', metavar='ID',
+                        help='Print the challenges matching each ID (12, 1-2 or 1-2-7) as JSON lines, '
+                             'reading the IDs from stdin when none are given; uses --quests as the file')
+    parser.add_argument('--validate', nargs='?', const='assets/Quest.json', metavar='FILE',
+                        help='Check a quest file in one pass: unique IDs, known tasks with the right intensity, '
+                             'and no repeated pairs or tasks on consecutive days (default: assets/Quest.json)')
+    parser.add_argument('--convert', nargs=2, metavar=('SOURCE', 'DEST'),
+                        help='Convert a quest file to another format, picked from the file extensions')
+    parser.add_argument('--quests', metavar='FILE', default=None,
+                        help='Quest file to browse in interactive mode (default: assets/Quest.json); '
+                             'a Quest.bin store is opened without loading it')
+    
+    parser.add_argument('--serve', action='store_true',
+                        help='Run an HTTP service answering GET /challenge/{path}-{intensity}?seed=N')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address the service listens on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000,
+                        help='Port the service listens on (default: 8000)')
+    parser.add_argument('--cache-size', type=int, default=1024,
+                        help='Number of challenge responses the service keeps in its LRU cache (default: 1024)')
+    
+    parser.add_argument('--compile-classes', action='store_true',
+                        help='Compile classes.json, Option_Description.json and the Quest.json IDs into ClassTable.json')
+    parser.add_argument('--compile-assets', action='store_true',
+                        help='Compile the JSON assets into AssetBundle.json with shared strings and print a size report')
     
     args = parser.parse_args()
     
-    if args.generate:
-        generate_quest_json(num_variations=args.variations)
+    if args.compile_classes:
+        try:
+            write_class_table()
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            exit(1)
+    elif args.query is not None:
+        quest_path = args.quests or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Quest.json')
+        try:
+            index = open_quest_index(quest_path)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            exit(1)
+        try:
+            total, missing = query_quests(index, args.query or sys.stdin, sys.stdout)
+        finally:
+            index.close()
+        if missing:
+            print(f"Error: {missing} of {total} IDs matched no challenge", file=sys.stderr)
+            exit(1)
+    elif args.validate:
+        try:
+            violations = validate_quest_file(args.validate)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            exit(1)
+        if violations:
+            print(f"Error: {violations} violations found in {args.validate}")
+            exit(1)
+    elif args.compile_assets:
+        try:
+            write_asset_bundle()
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            exit(1)
+    elif args.serve:
+        try:
+            serve_challenges(args.host, args.port, args.engine, args.cache_size)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            exit(1)
+    elif args.apply_patch:
+        old_path, patch_file, destination = args.apply_patch
+        try:
+            with open(patch_file, 'r', encoding='utf8') as f:
+                patch = json.load(f)
+            quests = apply_quest_patch(load_quests(old_path), patch)
+            written = write_if_changed(destination, serialize_quests(quests, format_for_path(destination)))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            exit(1)
+        print(f"Patched {old_path} with {len(quests['progressiveChallenges'])} challenges")
+        report_write(destination, written)
+    elif args.convert:
+        try:
+            convert_quests(*args.convert)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            exit(1)
+    elif args.generate:
+        # Profiling implies --stats, so the machine-readable stats are always saved alongside
+        if args.profile and not args.stats:
+            args.stats = 'generate_quests_stats.json'
+        stats = enable_stats() if args.stats else None
+        profiler = cProfile.Profile() if args.profile else None
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            generate_quest_json(num_variations=args.variations, engine=args.engine,
+                                seed=args.seed, workers=args.workers,
+                                stream=args.stream, resume=args.resume,
+                                output_format=args.output_format, report_formats=args.format_report,
+                                incremental=args.incremental, diff_against=args.diff_against,
+                                shard=args.shards)
+        except ValueError as e:
+            print(f"Error: {e}")
+            exit(1)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+        
+        if stats is not None:
+            report_run_stats(stats, time.perf_counter() - start, args.stats, profiler, args.profile)
     elif args.interactive:
-        quests = read_quests()
-        edit_quest(quests)
+        index = read_quests(args.quests)
+        edit_quest(index)
     else:
         # By default, run in interactive mode
-    quests = read_quests()
-    edit_quest(quests)
\ No newline at end of file
+        index = read_quests(args.quests)
+        edit_quest(index)
@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+import generate_quests
+
+ASSETS_DIR = os.path.dirname(os.path.abspath(__file__))
+LIBRARY_PATH = os.path.join(ASSETS_DIR, 'TaskLibrary.json')
+
+def write_edited_library(directory):
+    """Write a copy of TaskLibrary.json with one task reworded, one unused task dropped and one added"""
+    with open(LIBRARY_PATH, 'r', encoding='utf8') as f:
+        library = json.load(f)
+    library["meditation"]["task"] = "Guided meditation"
+    pooled = {task for tasks in generate_quests.PATH_TASKS.values() for task in tasks}
+    unused = [task for task in library if task != "task_category" and task not in pooled]
+    if unused:
+        del library[unused[0]]
+        for tasks in library["task_category"].values():
+            if unused[0] in tasks:
+                tasks.remove(unused[0])
+    library["stair-climbing"] = {
+        "task": "Stair climbing",
+        "category": "physical",
+        "intensities": {str(intensity): {"duration": f"{intensity * 5} minutes"}
+                        for intensity in generate_quests.INTENSITIES}
+    }
+    path = os.path.join(directory, 'TaskLibrary.json')
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(library, f, indent=2)
+    return path
+
+def generate(directory, library_path, **options):
+    """Generate a Quest.json into directory and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    generate_quests.generate_quest_json(library_path=library_path, output_dir=str(directory), **options)
+    return os.path.join(str(directory), 'Quest.json')
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_patch_reproduces_reshaped_generation(tmp_path):
+    old_path = generate(tmp_path / "old", LIBRARY_PATH, num_variations=2, seed=3)
+    new_path = generate(tmp_path / "new", write_edited_library(tmp_path), num_variations=3, seed=99)
+
+    # Reshape the new file: drop some challenges and move the rest around
+    new_quests = generate_quests.load_quests(new_path)
+    challenges = [generate_quests.challenge_dict(challenge) for challenge in new_quests["progressiveChallenges"]]
+    kept = [challenge for challenge in challenges if not challenge["id"].startswith("2-")]
+    new_quests["progressiveChallenges"] = kept[len(kept) // 2:] + kept[:len(kept) // 2]
+    generate_quests.write_if_changed(new_path, generate_quests.serialize_quests(new_quests))
+
+    old_quests = generate_quests.load_quests(old_path)
+    patch_path = generate_quests.patch_path_for(new_path)
+    generate_quests.write_quest_patch(old_quests, generate_quests.load_quests(new_path), patch_path)
+
+    with open(patch_path, 'r', encoding='utf8') as f:
+        patch = json.load(f)
+    delta = patch["progressiveChallenges"]
+    assert delta["removed"] and delta["changed"] and delta["added"] and "order" in delta
+    tasks = patch["taskLibrary"]
+    assert tasks["changed"] and tasks["added"]
+
+    patched = generate_quests.apply_quest_patch(generate_quests.load_quests(old_path), patch)
+    assert generate_quests.serialize_quests(patched) == read_bytes(new_path)
+
+def test_diff_against_writes_patch_for_next_generation(tmp_path):
+    old_path = generate(tmp_path / "old", LIBRARY_PATH, num_variations=1, seed=3)
+    new_path = generate(tmp_path / "new", write_edited_library(tmp_path), num_variations=2, seed=99,
+                        diff_against=old_path)
+
+    with open(generate_quests.patch_path_for(new_path), 'r', encoding='utf8') as f:
+        patch = json.load(f)
+    # One variation is written as "P-I" and two as "P-I-1" and "P-I-2", so every ID is replaced
+    assert len(patch["progressiveChallenges"]["removed"]) == 15
+    assert len(patch["progressiveChallenges"]["added"]) == 30
+
+    patched = generate_quests.apply_quest_patch(generate_quests.load_quests(old_path), patch)
+    assert generate_quests.serialize_quests(patched) == read_bytes(new_path)
+
+def test_patch_rejects_other_base(tmp_path):
+    old_path = generate(tmp_path / "old", LIBRARY_PATH, num_variations=1, seed=3)
+    other_path = generate(tmp_path / "other", LIBRARY_PATH, num_variations=1, seed=4)
+    new_path = generate(tmp_path / "new", LIBRARY_PATH, num_variations=1, seed=5)
+
+    patch = generate_quests.diff_quests(generate_quests.load_quests(old_path), generate_quests.load_quests(new_path))
+    with pytest.raises(ValueError):
+        generate_quests.apply_quest_patch(generate_quests.load_quests(other_path), patch)
+
+def write_library(directory, library):
+    path = os.path.join(directory, 'TaskLibrary.json')
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(library, f, indent=2)
+    return path
+
+def small_library(intensities):
+    """A library of two tasks that only have the given intensities"""
+    return {
+        "task_category": {},
+        **{task: {"task": task.title(), "category": "mindfulness",
+                  "intensities": {str(intensity): {"duration": "10 minutes"} for intensity in intensities}}
+           for task in ("breathing", "stretching")}
+    }
+
+def test_library_without_an_intensity_is_rejected(tmp_path, capsys):
+    library_path = write_library(tmp_path, small_library([1, 2, 3, 4]))
+    with pytest.raises(SystemExit):
+        generate_quests.load_task_library(use_cache=False, library_path=library_path)
+    assert "no task has intensity 5" in capsys.readouterr().out
+
+def test_small_library_only_uses_its_own_tasks(tmp_path):
+    library_path = write_library(tmp_path, small_library(generate_quests.INTENSITIES))
+    quests = generate_quests.load_quests(generate(tmp_path / "out", library_path, num_variations=1, seed=3))
+    for challenge in quests["progressiveChallenges"]:
+        for week in challenge["weeks"]:
+            for day in week["days"]:
+                assert set(day["tasks"]) <= set(quests["taskLibrary"])
+
+INDEX_CODES = ["1", "12", "1-2", "1-2-3", "1-2-9", "9-9", "1-", "1-2-3-4", "x"]
+
+@pytest.mark.parametrize("num_variations", [1, 3])
+def test_quest_indexes_agree(tmp_path, num_variations):
+    quest_path = generate(tmp_path, LIBRARY_PATH, num_variations=num_variations, seed=3)
+    store_path = os.path.join(str(tmp_path), generate_quests.OUTPUT_FORMATS["binary"])
+    generate_quests.convert_quests(quest_path, store_path)
+
+    indexes = [generate_quests.QuestIndex(generate_quests.load_quests(quest_path)),
+               generate_quests.LazyQuestIndex(quest_path),
+               generate_quests.open_quest_store(store_path)]
+    try:
+        expected = indexes[0]
+        for index in indexes[1:]:
+            assert index.base_ids() == expected.base_ids()
+            for code in INDEX_CODES + expected.base_ids():
+                assert [challenge["id"] for challenge in index.find(code)] == \
+                    [challenge["id"] for challenge in expected.find(code)], code
+                assert index.count(code) == expected.count(code), code
+    finally:
+        for index in indexes:
+            index.close()
+
+@pytest.mark.parametrize("code", ["1", "1-2", "1-2-3", "9-9-9"])
+def test_query_gives_same_result_for_every_format(tmp_path, code):
+    quest_path = generate(tmp_path, LIBRARY_PATH, num_variations=3, seed=3)
+    results = []
+    for output_format, filename in generate_quests.OUTPUT_FORMATS.items():
+        path = os.path.join(str(tmp_path), filename)
+        if output_format != "pretty":
+            generate_quests.convert_quests(quest_path, path)
+        completed = subprocess.run([sys.executable, os.path.join(ASSETS_DIR, 'generate_quests.py'),
+                                    '--query', code, '--quests', path], capture_output=True, text=True)
+        results.append((completed.returncode, completed.stdout))
+
+    assert all(result == results[0] for result in results[1:])
+    assert results[0][0] == (0 if code in ("1-2", "1-2-3") else 1)
+
+def require_engine(engine):
+    if engine == "numpy" and generate_quests.np is None:
+        pytest.skip("the numpy engine needs NumPy")
+
+@pytest.mark.parametrize("engine", generate_quests.ENGINES)
+def test_engines_keep_days_apart(tmp_path, engine):
+    require_engine(engine)
+    quest_path = generate(tmp_path, LIBRARY_PATH, num_variations=4, engine=engine, seed=11)
+    # The validator checks repeated tasks within a day and tasks on consecutive days, among others
+    assert generate_quests.validate_quest_file(quest_path) == 0
+
+    quests = generate_quests.load_quests(quest_path)
+    for challenge in quests["progressiveChallenges"]:
+        for week in challenge["weeks"]:
+            previous = set()
+            for day in week["days"]:
+                assert len(set(day["tasks"])) == len(day["tasks"])
+                assert not previous.intersection(day["tasks"])
+                previous = set(day["tasks"])
+
+@pytest.mark.parametrize("engine", generate_quests.ENGINES)
+def test_output_does_not_depend_on_workers(tmp_path, engine):
+    require_engine(engine)
+    single = generate(tmp_path / "single", LIBRARY_PATH, num_variations=3, engine=engine, seed=5, workers=1)
+    pooled = generate(tmp_path / "pooled", LIBRARY_PATH, num_variations=3, engine=engine, seed=5, workers=3)
+    assert read_bytes(single) == read_bytes(pooled)
+
+def test_validator_reports_broken_file(tmp_path):
+    quest_path = generate(tmp_path, LIBRARY_PATH, num_variations=1, seed=3)
+    assert generate_quests.validate_quest_file(quest_path) == 0
+
+    quests = generate_quests.load_quests(quest_path)
+    challenges = [generate_quests.challenge_dict(challenge) for challenge in quests["progressiveChallenges"]]
+    days = [challenge["weeks"][0]["days"] for challenge in challenges]
+    intensity = challenges[2]["intensity"]
+    challenges[1]["id"] = challenges[0]["id"]
+    days[2][0]["tasks"][0] = f"missing-task-{intensity}"
+    days[3][0]["tasks"][0] = days[3][0]["tasks"][0][:-1] + "9"
+    days[4][0]["tasks"] = [days[4][0]["tasks"][0]] * 2
+    days[5][1]["tasks"][0] = days[5][0]["tasks"][0]
+    days[6][2]["tasks"] = list(days[6][0]["tasks"])
+    challenges[7]["weeks"][0]["days"] = "not a list"
+    challenges[8]["weeks"][1] = "not a week"
+    quests["progressiveChallenges"] = challenges
+    broken_path = os.path.join(str(tmp_path), 'Broken.json')
+    with open(broken_path, 'wb') as f:
+        f.write(generate_quests.serialize_quests(quests))
+
+    validator = generate_quests.QuestValidator()
+    for kind, value in generate_quests.iter_quest_records(broken_path):
+        if kind == "challenge":
+            validator.check_challenge(value)
+        else:
+            validator.check_task(*value)
+    validator.finish()
+    assert {"duplicate_id", "unknown_task", "intensity_suffix", "repeated_task", "consecutive_days",
+            "repeated_pair", "days", "weeks"} <= set(validator.counts)
+    assert generate_quests.validate_quest_file(broken_path) == sum(validator.counts.values())
+
+def test_class_table_needs_every_option_description(tmp_path):
+    options_path = os.path.join(ASSETS_DIR, 'Option_Description.json')
+    classes_path = os.path.join(ASSETS_DIR, 'classes.json')
+    table = generate_quests.compile_class_table(classes_path, options_path)
+    assert all(isinstance(text, str) for entry in table.values() for text in entry["options"].values())
+
+    with open(options_path, 'r', encoding='utf8') as f:
+        options = json.load(f)
+    del options["0-0-2-0"]
+    broken_path = os.path.join(str(tmp_path), 'Option_Description.json')
+    with open(broken_path, 'w', encoding='utf8') as f:
+        json.dump(options, f)
+    with pytest.raises(ValueError, match="Option_Description has no 0-0-2-0"):
+        generate_quests.compile_class_table(classes_path, broken_path)
+
+def test_atomic_writer_syncs_before_replacing(tmp_path, monkeypatch):
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(generate_quests.os, "fsync", lambda fd: (synced.append(fd), fsync(fd)))
+    path = os.path.join(str(tmp_path), 'Quest.json')
+
+    assert generate_quests.write_if_changed(path, b'{"a": 1}')
+    assert len(synced) == (2 if os.name == 'posix' else 1)  # The file, then its directory
+    synced.clear()
+    assert not generate_quests.write_if_changed(path, b'{"a": 1}')
+    assert synced == []
+
+    with pytest.raises(RuntimeError):
+        with generate_quests.AtomicWriter(path) as f:
+            f.write(b'partial')
+            raise RuntimeError("interrupted")
+    assert read_bytes(path) == b'{"a": 1}'
+    assert os.listdir(str(tmp_path)) == ['Quest.json']
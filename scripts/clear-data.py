@@ -1,9 +1,31 @@
 import os
+import re
+import shlex
+import sqlite3
+import hashlib
 import subprocess
 import platform
 import json
+import time
+import asyncio
 import argparse
 
+# App whose AsyncStorage is cleared
+PACKAGE_NAME = "com.yourcompany.myapp"  # Replace with your actual package name
+BUNDLE_ID = "com.yourcompany.myapp"  # Replace with your actual bundle ID
+ASYNC_STORAGE_DIR = f"/data/data/{PACKAGE_NAME}/files/RCTAsyncLocalStorage_V1"
+
+# AsyncStorage's SQLite database on Android, and its manifest on iOS
+ANDROID_DATABASE = f"/data/data/{PACKAGE_NAME}/databases/RKStorage"
+ANDROID_TABLE = "catalystLocalStorage"
+IOS_STORAGE_DIRS = [
+    os.path.join("Library", "Application Support", BUNDLE_ID, "RCTAsyncLocalStorage_V1"),
+    os.path.join("Documents", "RCTAsyncLocalStorage_V1")
+]
+
+# A booted simulator line of `xcrun simctl list devices`: "iPhone 15 (UDID) (Booted)"
+BOOTED_SIMULATOR = re.compile(r"\(([0-9A-Fa-f-]{36})\) \(Booted\)")
+
 def run_command(command):
     """Execute a shell command and return the output"""
     process = subprocess.Popen(
@@ -24,7 +46,7 @@ def run_command(command):
 def clear_android_storage():
     """Clear AsyncStorage for Android using ADB"""
     # Get the app package name
-    package_name = "com.yourcompany.myapp"  # Replace with your actual package name
+    package_name = PACKAGE_NAME
     
     # Check if device is connected
     devices = run_command("adb devices")
@@ -62,7 +84,7 @@ def clear_ios_storage(simulator_id=None):
         simulator_id = simulators.split("(")[1].split(")")[0]
     
     # Get the app bundle ID
-    bundle_id = "com.yourcompany.myapp"  # Replace with your actual bundle ID
+    bundle_id = BUNDLE_ID
     
     # Clear the app's data
     print(f"Clearing data for app {bundle_id} on simulator {simulator_id}...")
@@ -76,19 +98,288 @@ def clear_ios_storage(simulator_id=None):
     print("✅ App data cleared successfully on iOS simulator")
     return True
 
+def key_selected(key, keys, prefixes):
+    """Return True if a storage key is one of keys or starts with one of prefixes"""
+    return key in keys or any(key.startswith(prefix) for prefix in prefixes)
+
+def build_delete_where(keys, prefixes):
+    """
+    Build the WHERE clause matching the selected keys of the AsyncStorage table
+    
+    Returns:
+        tuple: The clause with ? placeholders and its parameters
+    """
+    conditions = []
+    params = []
+    if keys:
+        conditions.append(f"key IN ({', '.join('?' * len(keys))})")
+        params.extend(keys)
+    for prefix in prefixes:
+        # Compared literally and case-sensitively, which LIKE would not do
+        conditions.append("substr(key, 1, length(?)) = ?")
+        params.extend([prefix, prefix])
+    return " OR ".join(conditions), params
+
+def quote_sql(value):
+    """Quote a value as an SQL string literal"""
+    return "'" + value.replace("'", "''") + "'"
+
+def build_delete_sql(keys, prefixes):
+    """
+    Build one SQL script deleting the selected keys in a single transaction and printing the count
+    
+    The sqlite3 shell on the device cannot bind parameters, so every key and
+    prefix is written as a quoted literal; the conditions match build_delete_where.
+    """
+    conditions = []
+    if keys:
+        conditions.append(f"key IN ({', '.join(quote_sql(key) for key in keys)})")
+    for prefix in prefixes:
+        literal = quote_sql(prefix)
+        conditions.append(f"substr(key, 1, length({literal})) = {literal}")
+    where = " OR ".join(conditions)
+    return f"BEGIN IMMEDIATE; DELETE FROM {ANDROID_TABLE} WHERE {where}; SELECT changes(); COMMIT;"
+
+def delete_keys_sqlite(database_path, keys, prefixes):
+    """Delete the selected keys from an AsyncStorage SQLite database in one transaction; returns the count"""
+    where, params = build_delete_where(keys, prefixes)
+    connection = sqlite3.connect(database_path)
+    try:
+        with connection:
+            return connection.execute(f"DELETE FROM {ANDROID_TABLE} WHERE {where}", params).rowcount
+    finally:
+        connection.close()
+
+def delete_keys_manifest(storage_dir, keys, prefixes):
+    """
+    Delete the selected keys from an AsyncStorage manifest directory; returns the count
+    
+    Small values live in manifest.json and large ones in a file named after the
+    MD5 of the key. The manifest is rewritten once and swapped in atomically,
+    then the files of the deleted large values are removed.
+    """
+    manifest_path = os.path.join(storage_dir, "manifest.json")
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    
+    keys = set(keys)
+    deleted = {key for key in manifest if key_selected(key, keys, prefixes)}
+    if not deleted:
+        return 0
+    
+    kept = {key: value for key, value in manifest.items() if key not in deleted}
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(kept, f)
+    os.replace(temp_path, manifest_path)
+    
+    for key in deleted:
+        if manifest[key] is None:
+            value_path = os.path.join(storage_dir, hashlib.md5(key.encode('utf-8')).hexdigest())
+            if os.path.exists(value_path):
+                os.remove(value_path)
+    return len(deleted)
+
+def delete_keys_local(path, keys, prefixes):
+    """Delete the selected keys from a local AsyncStorage copy: a SQLite file or a manifest directory"""
+    if os.path.isdir(path):
+        return delete_keys_manifest(path, keys, prefixes)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"No such file or directory: {path}")
+    return delete_keys_sqlite(path, keys, prefixes)
+
+async def run_command_async(*args):
+    """
+    Run a command without a shell and without blocking the event loop
+    
+    Returns:
+        tuple: The return code and the decoded stdout and stderr
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    return process.returncode, stdout.decode('utf-8'), stderr.decode('utf-8')
+
+async def list_android_devices():
+    """Return the serials of every device `adb devices` reports as ready"""
+    returncode, output, _ = await run_command_async("adb", "devices")
+    if returncode != 0:
+        return []
+    
+    serials = []
+    for line in output.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) >= 2 and fields[1] == "device":
+            serials.append(fields[0])
+    return serials
+
+async def list_booted_simulators():
+    """Return the UDIDs of every booted iOS simulator"""
+    returncode, output, _ = await run_command_async("xcrun", "simctl", "list", "devices")
+    if returncode != 0:
+        return []
+    return BOOTED_SIMULATOR.findall(output)
+
+async def clear_android_device(serial):
+    """Clear AsyncStorage on one Android device; returns an error message, or None on success"""
+    returncode, _, _ = await run_command_async(
+        "adb", "-s", serial, "shell", "run-as", PACKAGE_NAME, "cat", f"{ASYNC_STORAGE_DIR}/*.json")
+    if returncode != 0:
+        return f"Could not access AsyncStorage for {PACKAGE_NAME}. Is the app installed?"
+    
+    returncode, _, stderr = await run_command_async(
+        "adb", "-s", serial, "shell", "run-as", PACKAGE_NAME, "rm", "-rf", ASYNC_STORAGE_DIR)
+    if returncode != 0:
+        return stderr.strip() or f"rm exited with {returncode}"
+    return None
+
+async def clear_ios_simulator(simulator_id):
+    """Clear the app's data on one iOS simulator; returns an error message, or None on success"""
+    returncode, _, stderr = await run_command_async("xcrun", "simctl", "reset_data", simulator_id, BUNDLE_ID)
+    if returncode != 0:
+        return stderr.strip() or f"simctl exited with {returncode}"
+    return None
+
+async def delete_android_keys(serial, keys, prefixes):
+    """
+    Delete the selected keys on one Android device with a single sqlite3 call
+    
+    Returns:
+        tuple: An error message (None on success) and the number of deleted keys
+    """
+    sql = build_delete_sql(keys, prefixes)
+    returncode, stdout, stderr = await run_command_async(
+        "adb", "-s", serial, "shell", "run-as", PACKAGE_NAME, "sqlite3", ANDROID_DATABASE, shlex.quote(sql))
+    if returncode != 0:
+        return stderr.strip() or f"sqlite3 exited with {returncode}", None
+    try:
+        return None, int(stdout.split()[-1])
+    except (IndexError, ValueError):
+        return f"Unexpected sqlite3 output: {stdout.strip()!r}", None
+
+async def delete_ios_keys(simulator_id, keys, prefixes):
+    """
+    Delete the selected keys on one iOS simulator through its data container
+    
+    Returns:
+        tuple: An error message (None on success) and the number of deleted keys
+    """
+    returncode, stdout, stderr = await run_command_async(
+        "xcrun", "simctl", "get_app_container", simulator_id, BUNDLE_ID, "data")
+    if returncode != 0:
+        return stderr.strip() or f"simctl exited with {returncode}", None
+    
+    container = stdout.strip()
+    for storage_dir in IOS_STORAGE_DIRS:
+        storage_dir = os.path.join(container, storage_dir)
+        if os.path.exists(os.path.join(storage_dir, "manifest.json")):
+            # The manifest files are rewritten synchronously, so keep that off the event loop
+            return None, await asyncio.to_thread(delete_keys_manifest, storage_dir, keys, prefixes)
+    return f"No AsyncStorage manifest in {container}", None
+
+async def clear_all_devices(platforms, concurrency=4, selection=None, first_only=False):
+    """
+    Clear every connected Android device and booted iOS simulator concurrently
+    
+    Args:
+        platforms (list): "android" and/or "ios"
+        concurrency (int): Maximum number of devices cleared at the same time
+        selection (tuple): Keys and prefixes to delete instead of clearing all data
+        first_only (bool): Only clear the first device of each platform
+        
+    Returns:
+        list: One result per device with its platform, ID, error (None on
+            success), number of deleted keys (None when all data was cleared)
+            and the seconds it took
+    """
+    # Find the targets; a missing adb or xcrun just means no devices of that kind
+    listers = {"android": list_android_devices, "ios": list_booted_simulators}
+    clearers = {"android": clear_android_device, "ios": clear_ios_simulator}
+    deleters = {"android": delete_android_keys, "ios": delete_ios_keys}
+    targets = []
+    for platform_name in platforms:
+        try:
+            devices = await listers[platform_name]()
+        except FileNotFoundError as e:
+            print(f"⚠️ Skipping {platform_name}: {e.filename} not found")
+            continue
+        targets.extend((platform_name, device) for device in devices[:1 if first_only else None])
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def clear(platform_name, device):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                if selection is None:
+                    error, deleted = await clearers[platform_name](device), None
+                else:
+                    error, deleted = await deleters[platform_name](device, *selection)
+            except (OSError, ValueError) as e:
+                error, deleted = str(e), None
+            seconds = time.perf_counter() - start
+        print(f"{'✅' if error is None else '❌'} {platform_name} {device} ({seconds:.2f}s)")
+        return {"platform": platform_name, "device": device, "error": error,
+                "deleted": deleted, "seconds": seconds}
+    
+    return await asyncio.gather(*(clear(platform_name, device) for platform_name, device in targets))
+
+def print_device_results(results, total_seconds):
+    """Print the outcome and timing of every device cleared by clear_all_devices"""
+    print("\n-----------------------------------")
+    print(f"{'Platform':<10}{'Device':<40}{'Result':<8}{'Keys':>6}{'Time (s)':>9}")
+    print("-----------------------------------")
+    for result in results:
+        status = "ok" if result["error"] is None else "failed"
+        deleted = "all" if result["deleted"] is None else result["deleted"]
+        if result["error"] is not None:
+            deleted = "-"
+        print(f"{result['platform']:<10}{result['device']:<40}{status:<8}{deleted:>6}{result['seconds']:>9.2f}")
+        if result["error"] is not None:
+            print(f"    {result['error']}")
+    print("-----------------------------------")
+    cleared = sum(result["error"] is None for result in results)
+    print(f"Cleared {cleared} of {len(results)} devices in {total_seconds:.2f}s")
+
 def main():
     parser = argparse.ArgumentParser(description='Clear React Native AsyncStorage data.')
     parser.add_argument('--platform', choices=['android', 'ios', 'both'], default='both',
                         help='Platform to clear data for (android, ios, or both)')
+    parser.add_argument('--all-devices', action='store_true',
+                        help='Clear every connected adb device and every booted simulator, concurrently')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Maximum number of devices cleared at the same time with --all-devices (default: 4)')
+    parser.add_argument('--keys', nargs='+', default=[], metavar='KEY',
+                        help='Only delete these AsyncStorage keys instead of clearing all data')
+    parser.add_argument('--prefix', nargs='+', default=[], dest='prefixes', metavar='PREFIX',
+                        help='Only delete the AsyncStorage keys starting with these prefixes')
+    parser.add_argument('--database', metavar='PATH',
+                        help='Delete the --keys/--prefix keys from a local AsyncStorage copy instead of a device: '
+                             'an RKStorage SQLite file or an RCTAsyncLocalStorage_V1 directory')
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    selection = (args.keys, args.prefixes) if args.keys or args.prefixes else None
+    if args.database and selection is None:
+        parser.error("--database needs --keys or --prefix")
     
     print("🧹 React Native AsyncStorage Cleaner")
     print("-----------------------------------")
-    print("This will clear all user data including:")
-    print("- User profile information")
-    print("- Login credentials")
-    print("- Tasks (daily, weekly, additional)")
-    print("- User preferences and app settings")
+    if selection is None:
+        print("This will clear all user data including:")
+        print("- User profile information")
+        print("- Login credentials")
+        print("- Tasks (daily, weekly, additional)")
+        print("- User preferences and app settings")
+    else:
+        print("This will delete only these keys:")
+        for key in args.keys:
+            print(f"- {key}")
+        for prefix in args.prefixes:
+            print(f"- every key starting with {prefix}")
     print("-----------------------------------")
     
     confirm = input("Are you sure you want to continue? (y/n): ")
@@ -98,18 +389,39 @@ def main():
     
     success = False
     
-    if args.platform in ['android', 'both']:
-        if platform.system() != 'Windows' and platform.system() != 'Linux':
-            print("⚠️ Android clearing only supported on Windows and Linux")
+    if args.database:
+        try:
+            deleted = delete_keys_local(args.database, args.keys, args.prefixes)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Error: {e}")
         else:
-            pass
-            #success = clear_android_storage() or success
-    
-    if args.platform in ['ios', 'both']:
-        if platform.system() != 'Darwin':
-            print("⚠️ iOS clearing only supported on macOS")
+            print(f"✅ Deleted {deleted} keys from {args.database}")
+            success = True
+    elif args.all_devices or selection is not None:
+        # Deleting selected keys goes through the device pipeline too; without
+        # --all-devices it only takes the first device of each platform
+        platforms = ['android', 'ios'] if args.platform == 'both' else [args.platform]
+        start = time.perf_counter()
+        results = asyncio.run(clear_all_devices(platforms, args.concurrency, selection,
+                                                first_only=not args.all_devices))
+        if results:
+            print_device_results(results, time.perf_counter() - start)
+            success = all(result["error"] is None for result in results)
         else:
-            success = clear_ios_storage() or success
+            print("No Android devices or booted iOS simulators found.")
+    else:
+        if args.platform in ['android', 'both']:
+            if platform.system() != 'Windows' and platform.system() != 'Linux':
+                print("⚠️ Android clearing only supported on Windows and Linux")
+            else:
+                pass
+                #success = clear_android_storage() or success
+        
+        if args.platform in ['ios', 'both']:
+            if platform.system() != 'Darwin':
+                print("⚠️ iOS clearing only supported on macOS")
+            else:
+                success = clear_ios_storage() or success
     
     if success:
         print("\n✅ Cleanup completed successfully!")
@@ -124,3 +436,5 @@ if __name__ == "__main__":
 # How to run the script
 # pip install argparse
 # python clear-data.py
+# python clear-data.py --all-devices --concurrency 8   (every device and simulator at once)
+# python clear-data.py --all-devices --prefix task_ --keys cachedQuests   (keep login and settings)
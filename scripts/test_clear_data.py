@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import sqlite3
+import importlib.util
+
+# clear-data.py is not importable by name because of the hyphen
+_spec = importlib.util.spec_from_file_location(
+    "clear_data", os.path.join(os.path.dirname(os.path.abspath(__file__)), "clear-data.py"))
+clear_data = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(clear_data)
+
+STORED_KEYS = ["what?", "other", "it's", "100%", "100%done", "keep", "prefix?a", "prefix?b", "prefixed",
+               "o'brien:1", "o'brien:2", "x' OR '1'='1"]
+
+def run_delete_sql(keys, prefixes):
+    """Run build_delete_sql against an in-memory AsyncStorage table and return (printed count, keys left)"""
+    connection = sqlite3.connect(":memory:", isolation_level=None)
+    try:
+        connection.execute(f"CREATE TABLE {clear_data.ANDROID_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+        connection.executemany(f"INSERT INTO {clear_data.ANDROID_TABLE} VALUES (?, ?)",
+                               [(key, "value") for key in STORED_KEYS])
+        count = None
+        for statement in clear_data.build_delete_sql(keys, prefixes).split(";"):
+            if statement.strip():
+                row = connection.execute(statement).fetchone()
+                if row is not None:
+                    count = row[0]
+        left = sorted(row[0] for row in connection.execute(f"SELECT key FROM {clear_data.ANDROID_TABLE}"))
+        return count, left
+    finally:
+        connection.close()
+
+def expected_left(keys, prefixes):
+    return sorted(key for key in STORED_KEYS if not clear_data.key_selected(key, keys, prefixes))
+
+def test_delete_sql_keys_with_special_characters():
+    keys = ["what?", "other", "it's", "100%"]
+    count, left = run_delete_sql(keys, [])
+    assert count == 4
+    assert left == expected_left(keys, [])
+
+def test_delete_sql_prefixes_are_literal():
+    prefixes = ["prefix?", "o'brien:", "100%"]
+    count, left = run_delete_sql([], prefixes)
+    assert count == 6
+    assert left == expected_left([], prefixes)
+
+def test_delete_sql_quotes_cannot_inject():
+    keys = ["x' OR '1'='1", "missing?"]
+    prefixes = ["' OR 1=1 --"]
+    count, left = run_delete_sql(keys, prefixes)
+    assert count == 1
+    assert left == expected_left(keys, prefixes)
+
+def test_delete_sql_matches_sqlite_deletion(tmp_path):
+    keys = ["what?", "it's"]
+    prefixes = ["100%", "prefix?"]
+    database = tmp_path / "RKStorage"
+    connection = sqlite3.connect(database)
+    with connection:
+        connection.execute(f"CREATE TABLE {clear_data.ANDROID_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+        connection.executemany(f"INSERT INTO {clear_data.ANDROID_TABLE} VALUES (?, ?)",
+                               [(key, "value") for key in STORED_KEYS])
+    connection.close()
+
+    assert clear_data.delete_keys_sqlite(str(database), keys, prefixes) == run_delete_sql(keys, prefixes)[0]
+
+# Fake adb and xcrun executables for the multi-device tests. Each one records
+# how many device commands run at once, and works on files in the state directory.
+FAKE_TOOL_HEADER = '''#!{python}
+import os
+import sys
+import json
+import time
+import shlex
+import sqlite3
+
+STATE = {state!r}
+BUSY_DEVICES = {busy!r}
+
+def busy(device):
+    """Hold a device command open for a moment and log how many run at once"""
+    marker = os.path.join(STATE, "running", f"{{os.getpid()}}")
+    open(marker, 'w').close()
+    with open(os.path.join(STATE, "concurrency.log"), 'a') as f:
+        f.write(f"{{len(os.listdir(os.path.join(STATE, 'running')))}}\\n")
+    time.sleep(0.2)
+    os.remove(marker)
+    if device in BUSY_DEVICES:
+        sys.stderr.write(f"device {{device}} is busy\\n")
+        sys.exit(1)
+
+args = sys.argv[1:]
+'''
+
+FAKE_ADB = '''
+if args == ["devices"]:
+    print("List of devices attached")
+    print("emulator-5554\\tdevice")
+    print("emulator-5556\\tdevice")
+    print("emulator-5558\\tdevice")
+    print("emulator-5560\\toffline")
+    sys.exit(0)
+
+serial = args[1]
+command = args[5:]
+busy(serial)
+if command[0] == "sqlite3":
+    # The real device shell unquotes the script before sqlite3 sees it
+    connection = sqlite3.connect(os.path.join(STATE, serial + ".db"), isolation_level=None)
+    for statement in shlex.split(command[2])[0].split(";"):
+        if statement.strip():
+            row = connection.execute(statement).fetchone()
+            if row is not None:
+                print(row[0])
+'''
+
+FAKE_XCRUN = '''
+if args == ["simctl", "list", "devices"]:
+    print("== Devices ==")
+    print("-- iOS 17.0 --")
+    print("    iPhone 15 (11111111-1111-1111-1111-111111111111) (Booted)")
+    print("    iPhone 15 Pro (22222222-2222-2222-2222-222222222222) (Booted)")
+    print("    iPad (33333333-3333-3333-3333-333333333333) (Shutdown)")
+    sys.exit(0)
+
+busy(args[2])
+if args[1] == "get_app_container":
+    print(os.path.join(STATE, args[2]))
+'''
+
+ANDROID_SERIALS = ["emulator-5554", "emulator-5556", "emulator-5558"]
+SIMULATORS = ["11111111-1111-1111-1111-111111111111", "22222222-2222-2222-2222-222222222222"]
+
+def install_fake_tools(tmp_path, monkeypatch, busy=()):
+    """Put fake adb and xcrun first on PATH; returns their state directory"""
+    state = tmp_path / "state"
+    (state / "running").mkdir(parents=True)
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    header = FAKE_TOOL_HEADER.format(python=sys.executable, state=str(state), busy=list(busy))
+    for name, body in (("adb", FAKE_ADB), ("xcrun", FAKE_XCRUN)):
+        tool = bin_dir / name
+        tool.write_text(header + body)
+        tool.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ.get("PATH", ""))
+    return state
+
+def max_concurrency(state):
+    with open(state / "concurrency.log") as f:
+        return max(int(line) for line in f)
+
+def test_all_devices_clears_every_device_within_concurrency(tmp_path, monkeypatch, capsys):
+    state = install_fake_tools(tmp_path, monkeypatch, busy=["emulator-5556"])
+    results = asyncio.run(clear_data.clear_all_devices(["android", "ios"], concurrency=2))
+
+    assert [(result["platform"], result["device"]) for result in results] == \
+        [("android", serial) for serial in ANDROID_SERIALS] + [("ios", udid) for udid in SIMULATORS]
+    errors = {result["device"]: result["error"] for result in results}
+    assert errors.pop("emulator-5556") == "Could not access AsyncStorage for com.yourcompany.myapp. Is the app installed?"
+    assert set(errors.values()) == {None}
+    assert max_concurrency(state) == 2
+
+    clear_data.print_device_results(results, 1.0)
+    assert "Cleared 4 of 5 devices" in capsys.readouterr().out
+
+def test_first_only_takes_one_device_per_platform(tmp_path, monkeypatch):
+    install_fake_tools(tmp_path, monkeypatch)
+    results = asyncio.run(clear_data.clear_all_devices(["android", "ios"], first_only=True))
+    assert [result["device"] for result in results] == [ANDROID_SERIALS[0], SIMULATORS[0]]
+
+def write_ios_storage(container, manifest, large_values):
+    storage_dir = os.path.join(container, clear_data.IOS_STORAGE_DIRS[0])
+    os.makedirs(storage_dir)
+    with open(os.path.join(storage_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    for key in large_values:
+        with open(os.path.join(storage_dir, hashlib.md5(key.encode('utf-8')).hexdigest()), 'w') as f:
+            f.write('"large value"')
+    return storage_dir
+
+def test_selected_keys_are_deleted_on_every_device(tmp_path, monkeypatch):
+    state = install_fake_tools(tmp_path, monkeypatch)
+    for serial in ANDROID_SERIALS:
+        connection = sqlite3.connect(state / (serial + ".db"))
+        with connection:
+            connection.execute(f"CREATE TABLE {clear_data.ANDROID_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+            connection.executemany(f"INSERT INTO {clear_data.ANDROID_TABLE} VALUES (?, ?)",
+                                   [(key, "value") for key in STORED_KEYS])
+        connection.close()
+    manifest = {"task_daily": None, "task_weekly": "[]", "userProfile": "{}", "cachedQuests": None, "login": None}
+    storage_dirs = [write_ios_storage(state / udid, manifest, ["task_daily", "cachedQuests", "login"])
+                    for udid in SIMULATORS]
+
+    selection = (["cachedQuests", "it's"], ["task_", "prefix?"])
+    results = asyncio.run(clear_data.clear_all_devices(["android", "ios"], concurrency=3, selection=selection))
+
+    assert [result["error"] for result in results] == [None] * 5
+    assert [result["deleted"] for result in results] == [3, 3, 3, 3, 3]
+    for serial in ANDROID_SERIALS:
+        connection = sqlite3.connect(state / (serial + ".db"))
+        left = sorted(row[0] for row in connection.execute(f"SELECT key FROM {clear_data.ANDROID_TABLE}"))
+        connection.close()
+        assert left == expected_left(*selection)
+    for storage_dir in storage_dirs:
+        with open(os.path.join(storage_dir, "manifest.json"), encoding='utf-8') as f:
+            assert sorted(json.load(f)) == ["login", "userProfile"]
+        # Only the large value of the kept key is left next to the manifest
+        assert sorted(os.listdir(storage_dir)) == sorted(["manifest.json", hashlib.md5(b"login").hexdigest()])
+    assert max_concurrency(state) <= 3
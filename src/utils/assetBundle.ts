@@ -0,0 +1,69 @@
+import bundleData from '../../assets/AssetBundle.json';
+
+/**
+ * Reader for assets/AssetBundle.json, compiled by
+ * `python assets/generate_quests.py --compile-assets`.
+ *
+ * The bundle holds Quest.json, Quote.json, TaskLibrary.json, classes.json and
+ * Option_Description.json with their repeated strings stored once in
+ * `strings`. Inside the fields listed for an asset (or the whole asset for
+ * ""), a number is an index into `strings`. Each asset is expanded the first
+ * time it is asked for and then cached.
+ */
+
+export type AssetName =
+  | 'Quest.json'
+  | 'Quote.json'
+  | 'TaskLibrary.json'
+  | 'classes.json'
+  | 'Option_Description.json';
+
+type JsonValue = string | number | boolean | null | JsonValue[] | { [key: string]: JsonValue };
+
+interface AssetBundle {
+  bundleVersion: number;
+  strings: string[];
+  fields: Record<string, string[]>;
+  files: Record<string, JsonValue>;
+}
+
+const ASSET_BUNDLE_VERSION = 1;
+
+const bundle = bundleData as unknown as AssetBundle;
+const expandedAssets: Partial<Record<AssetName, unknown>> = {};
+
+/**
+ * Replace string indexes inside interned fields with their strings
+ */
+const expandValue = (value: JsonValue, fields: Set<string>, interned: boolean): JsonValue => {
+  if (Array.isArray(value)) {
+    return value.map(item => expandValue(item, fields, interned));
+  }
+  if (value !== null && typeof value === 'object') {
+    const expanded: { [key: string]: JsonValue } = {};
+    for (const key of Object.keys(value)) {
+      expanded[key] = expandValue(value[key], fields, interned || fields.has(key));
+    }
+    return expanded;
+  }
+  if (interned && typeof value === 'number') {
+    return bundle.strings[value];
+  }
+  return value;
+};
+
+/**
+ * Get one asset from the bundle, in the same shape as its JSON file
+ * @param name - Asset file name, e.g. 'Quest.json'
+ * @returns The asset's content
+ */
+export const getAsset = <T = unknown>(name: AssetName): T => {
+  if (bundle.bundleVersion !== ASSET_BUNDLE_VERSION) {
+    throw new Error(`Asset bundle version ${bundle.bundleVersion} is not supported (expected ${ASSET_BUNDLE_VERSION})`);
+  }
+  if (!(name in expandedAssets)) {
+    const fields = bundle.fields[name] || [];
+    expandedAssets[name] = expandValue(bundle.files[name], new Set(fields), fields.includes(''));
+  }
+  return expandedAssets[name] as T;
+};